@@ -0,0 +1,95 @@
+"""
+Micro-benchmark of preprocess_text: the original regex chain against TextNormalizer.
+
+Usage:
+    python benchmarks/bench_preprocessing.py [--data data/raw/resolutions_data.jsonl] [--limit 200]
+
+Normalization alone is always measured. The end-to-end comparison, including
+spaCy lemmatization, runs only when the pt_core_news_sm model is installed.
+"""
+import argparse
+import re
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+from data_collection.resolution_records import RESOLUTIONS_FILE_NAME, iter_resolutions
+from data_mining.preprocessing import HEADER_PATTERN, TextNormalizer
+
+SAMPLE_TEXT = (
+    "RESOLUÇÃO BCB Nº 123, DE 15 DE MARÇO DE 2022\n"
+    "Dispõe sobre os procedimentos a serem observados pelas instituições financeiras "
+    "e demais instituições autorizadas a funcionar pelo Banco Central do Brasil. "
+    "Art. 1º Esta Resolução estabelece os requisitos mínimos para a abertura de contas "
+    "de depósitos, nos termos do art. 2º da Lei nº 4.595, de 31 de dezembro de 1964. "
+) * 40
+
+def legacy_clean_text(text):
+    text = re.sub(HEADER_PATTERN, '', text)
+    text = re.sub(r'\W', ' ', text)
+    text = re.sub(r'\d', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = text.lower()
+    words = word_tokenize(text, language='portuguese')
+    stop_words = set(stopwords.words('portuguese'))
+    return [word for word in words if word not in stop_words]
+
+def load_texts(data_path, limit):
+    if data_path.exists():
+        texts = [res['content'] or '' for res in islice(iter_resolutions(data_path, fields=('content',)), limit)]
+        if texts:
+            return texts
+    return [SAMPLE_TEXT] * limit
+
+def measure(name, func, texts, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    docs_per_second = len(texts) / best
+    print(f"{name:<32} {best * 1000 / len(texts):>10.3f} ms/doc {docs_per_second:>12.1f} docs/s")
+    return docs_per_second
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', type=Path, default=Path('data/raw') / RESOLUTIONS_FILE_NAME)
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_texts(args.data, args.limit)
+    normalizer = TextNormalizer()
+    print(f"{len(texts)} documents, {sum(map(len, texts)) / len(texts):.0f} characters on average\n")
+
+    before = measure("normalize (regex chain)", legacy_clean_text, texts, args.repeat)
+    after = measure("normalize (TextNormalizer)", normalizer.tokens, texts, args.repeat)
+    print(f"{'speedup':<32} {after / before:>10.2f}x\n")
+
+    try:
+        from data_mining.nlp_pipeline import LEMMATIZER_COMPONENTS, load_nlp, make_doc, parse_document
+        load_nlp()
+    except (ImportError, OSError) as e:
+        print(f"Skipping end-to-end benchmark, spaCy model unavailable: {e}")
+        return
+
+    before = measure(
+        "preprocess_text (before)",
+        lambda text: parse_document(' '.join(legacy_clean_text(text)), LEMMATIZER_COMPONENTS),
+        texts, args.repeat
+    )
+    after = measure(
+        "preprocess_text (after)",
+        lambda text: parse_document(make_doc(normalizer.tokens(text)), LEMMATIZER_COMPONENTS),
+        texts, args.repeat
+    )
+    print(f"{'speedup':<32} {after / before:>10.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Startup-time benchmark of the data mining entry point.
+
+Usage:
+    python benchmarks/bench_startup.py [--backend word2vec --backend bert] [--repeat 5]
+
+Each measurement runs in a fresh interpreter and reports the wall time and
+peak RSS after importing data_mining.main, which is all a metrics-only run
+pays before it starts processing, and after loading each requested
+embedding backend on top of that.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import data_mining.main
+from data_mining.embeddings import load_embedding_backend
+backend = sys.argv[1]
+if backend:
+    load_embedding_backend(backend)
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_modules': sorted(m for m in ('tensorflow', 'transformers', 'gensim', 'xgboost', 'plotly', 'seaborn',
+                                        'spacy', 'sklearn') if m in sys.modules),
+}))
+"""
+
+def measure(backend, repeat):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE, backend or ''],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'peak_rss_mb': statistics.median(run['peak_rss_mb'] for run in runs),
+        'heavy_modules': runs[-1]['heavy_modules'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', action='append', default=[], help="Embedding backend to load (repeatable).")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'configuration':<20} {'startup':>10} {'peak RSS':>12}  heavy modules imported")
+    for backend in [None] + args.backend:
+        result = measure(backend, args.repeat)
+        print(f"{backend or 'metrics only':<20} {result['seconds']:>9.3f}s {result['peak_rss_mb']:>9.1f} MB  "
+              f"{', '.join(result['heavy_modules']) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Offline benchmark suite over a synthetic resolution corpus.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 100 1000] [--only parse_html preprocess_text]
+                                        [--save-baseline] [--tolerance 0.15] [--trace-memory]
+
+Every benchmark runs on the corpus generated by synthetic_corpus.py at each
+requested size (100 to 100k documents), in a scratch directory so reports
+and stores never touch the working tree. Benchmarks whose dependencies or
+models are not installed are reported as skipped.
+
+Results are written to benchmarks/results/<timestamp>.json and compared
+with benchmarks/results/baseline.json; ``--save-baseline`` makes the current
+run the new baseline. A benchmark slower than the baseline by more than
+``--tolerance`` is reported as a regression and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from synthetic_corpus import generate_resolutions, render_resolution_html
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+BASELINE_PATH = RESULTS_DIR / 'baseline.json'
+# Resolution pages saved from the Central Bank site, as lxml sees them in production.
+SAVED_PAGES_DIR = ROOT / 'tests' / 'fixtures'
+DEFAULT_SIZES = (100, 1000)
+# Model training and NLP parsing are capped so large sizes stay practical.
+MAX_NLP_DOCUMENTS = 2000
+MAX_TRAINING_DOCUMENTS = 5000
+
+class SkipBenchmark(Exception):
+    pass
+
+@contextmanager
+def scratch_directory():
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='bench-') as directory:
+        os.chdir(directory)
+        Path('reports').mkdir()
+        try:
+            yield Path(directory)
+        finally:
+            os.chdir(previous)
+
+def bench_parse_html(records):
+    from data_collection.http_fetcher import parse_resolution_html
+
+    # Synthetic pages scale with the corpus; the saved pages are repeated to as many.
+    saved_pages = [path.read_text(encoding='utf-8') for path in sorted(SAVED_PAGES_DIR.glob('*.html'))]
+    pages = [render_resolution_html(record) for record in records]
+    pages += [saved_pages[i % len(saved_pages)] for i in range(len(records))] if saved_pages else []
+    start = time.perf_counter()
+    for page in pages:
+        parse_resolution_html(page)
+    return time.perf_counter() - start, len(pages)
+
+def bench_normalize(records):
+    from data_mining.preprocessing import normalizer
+
+    try:
+        normalizer.stop_words
+    except (ImportError, LookupError, OSError) as e:
+        raise SkipBenchmark(f"NLTK stop words unavailable: {e}")
+    start = time.perf_counter()
+    for record in records:
+        normalizer.tokens(record['content'])
+    return time.perf_counter() - start, len(records)
+
+def _require_spacy_model():
+    try:
+        from data_mining.nlp_pipeline import load_nlp
+
+        load_nlp()
+    except (ImportError, OSError) as e:
+        raise SkipBenchmark(f"spaCy model unavailable: {e}")
+
+def bench_preprocess_text(records):
+    _require_spacy_model()
+    from data_mining.preprocessing import preprocess_text
+
+    texts = [record['content'] for record in records[:MAX_NLP_DOCUMENTS]]
+    start = time.perf_counter()
+    for text in texts:
+        preprocess_text(text)
+    return time.perf_counter() - start, len(texts)
+
+def bench_complexity_metrics(records):
+    _require_spacy_model()
+    from data_analysis.complexity_analysis import calculate_corpus_complexity_metrics
+
+    texts = [record['content'] for record in records[:MAX_NLP_DOCUMENTS]]
+    start = time.perf_counter()
+    calculate_corpus_complexity_metrics(texts)
+    return time.perf_counter() - start, len(texts)
+
+def bench_train_and_evaluate_model(records):
+    try:
+        from sklearn.preprocessing import LabelEncoder
+        from data_mining.categorization_model import train_and_evaluate_model
+        from data_mining.text_features import sparse_text_features
+    except ImportError as e:
+        raise SkipBenchmark(f"modelling dependencies unavailable: {e}")
+
+    records = records[:MAX_TRAINING_DOCUMENTS]
+    # Lower-cased content stands in for the lemmatized text, which needs the spaCy model.
+    X, _ = sparse_text_features([record['content'].lower() for record in records], 'hashing', n_features=2 ** 14)
+    y = LabelEncoder().fit_transform([record['category'] for record in records])
+    start = time.perf_counter()
+    y_pred = train_and_evaluate_model(X, y, n_jobs=-1)
+    if y_pred is None:
+        raise RuntimeError("train_and_evaluate_model failed, see the log")
+    return time.perf_counter() - start, len(records)
+
+def bench_plot_trends(records):
+    try:
+        from data_analysis.analytics_store import analytics_row, write_analytics_store
+        from data_analysis.longitudinal_analysis import plot_trends
+    except ImportError as e:
+        raise SkipBenchmark(f"analysis dependencies unavailable: {e}")
+
+    write_analytics_store(analytics_row(record) for record in records)
+    start = time.perf_counter()
+    plot_trends(granularity='month')
+    return time.perf_counter() - start, len(records)
+
+BENCHMARKS = {
+    'parse_html': bench_parse_html,
+    'normalize': bench_normalize,
+    'preprocess_text': bench_preprocess_text,
+    'complexity_metrics': bench_complexity_metrics,
+    'train_and_evaluate_model': bench_train_and_evaluate_model,
+    'plot_trends': bench_plot_trends,
+}
+
+def run_benchmark(name, records, trace_memory=False):
+    """
+    Time one benchmark in a scratch directory.
+
+    With ``trace_memory`` the peak memory allocated through Python is also
+    reported; tracing slows allocation down, so timings of such runs should
+    not be compared with untraced ones.
+    """
+    with scratch_directory():
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            seconds, documents = BENCHMARKS[name](records)
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        except SkipBenchmark as e:
+            return {'skipped': str(e)}
+        except Exception as e:
+            return {'error': f"{type(e).__name__}: {e}"}
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+    result = {
+        'seconds': round(seconds, 4),
+        'documents': documents,
+        'documents_per_second': round(documents / seconds, 1) if seconds else None
+    }
+    if peak is not None:
+        result['peak_traced_mb'] = round(peak / 2 ** 20, 1)
+    return result
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'commit': commit}
+
+def compare(results, baseline, tolerance):
+    """Print the change against the baseline; returns the regressed benchmarks."""
+    regressions = []
+    print(f"\n{'benchmark':<32} {'size':>7} {'seconds':>10} {'baseline':>10} {'change':>8}")
+    for key, result in sorted(results.items()):
+        name, size = key.rsplit('@', 1)
+        if 'seconds' not in result:
+            print(f"{name:<32} {size:>7} {'-':>10} {'':>10} {result.get('skipped') or result.get('error')}")
+            continue
+        base = baseline.get(key, {}).get('seconds')
+        if not base:
+            print(f"{name:<32} {size:>7} {result['seconds']:>10.3f} {'-':>10}")
+            continue
+        change = result['seconds'] / base - 1
+        flag = '  REGRESSION' if change > tolerance else ''
+        print(f"{name:<32} {size:>7} {result['seconds']:>10.3f} {base:>10.3f} {change:>+7.0%}{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--only', nargs='+', choices=tuple(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Also report peak traced memory (slows the benchmarks down).")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Relative slowdown over the baseline reported as a regression.")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        records = list(generate_resolutions(size, args.seed))
+        for name in args.only:
+            results[f'{name}@{size}'] = result = run_benchmark(name, records, args.trace_memory)
+            summary = (f"{result['seconds']:.3f}s, {result['documents_per_second']} docs/s"
+                       if 'seconds' in result else result.get('skipped') or result.get('error'))
+            print(f"{name} ({size} documents): {summary}", flush=True)
+
+    run = {'created_at': datetime.now().isoformat(), 'seed': args.seed, 'trace_memory': args.trace_memory,
+           'environment': environment(), 'results': results}
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    run_path = RESULTS_DIR / f"{datetime.now():%Y%m%dT%H%M%S}.json"
+    run_path.write_text(json.dumps(run, indent=2), encoding='utf-8')
+    print(f"\nResults written to {run_path}")
+
+    regressions = []
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        print(f"Compared with baseline {args.baseline} (commit {baseline['environment'].get('commit')})")
+        regressions = compare(results, baseline['results'], args.tolerance)
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(run, indent=2), encoding='utf-8')
+        print(f"Saved as baseline {args.baseline}")
+
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
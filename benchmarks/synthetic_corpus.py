@@ -0,0 +1,136 @@
+"""
+Synthetic corpus of Central Bank resolution-like documents for offline benchmarks.
+
+Usage:
+    python benchmarks/synthetic_corpus.py --size 1000 [--seed 0] [--output data/synthetic/resolutions_data.jsonl]
+                                          [--html-dir data/synthetic/html]
+
+Records have the shape written by the collector: a title ending in the
+publication date, content starting with a ``RESOLUÇÃO BCB Nº ..., DE ...``
+header, and a category whose vocabulary differs from the others so that the
+models have something to learn. A share of the documents amend an earlier
+one, which exercises near-duplicate detection. The same seed always yields
+the same corpus.
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import date, datetime, timedelta
+from html import escape
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from data_collection.resolution_records import RESOLUTIONS_FILE_NAME
+
+MONTHS = ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO',
+          'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO']
+FIRST_DATE = date(2020, 1, 1)
+LAST_DATE = date(2024, 12, 31)
+AMENDMENT_SHARE = 0.1
+
+SUBJECTS = {
+    'credito': ['operações de crédito', 'provisão para perdas', 'risco de crédito', 'garantias reais',
+                'carteira de empréstimos', 'renegociação de dívidas'],
+    'cambio': ['operações de câmbio', 'moeda estrangeira', 'contratos de câmbio', 'remessas internacionais',
+               'capitais estrangeiros', 'taxa de câmbio'],
+    'pagamentos': ['arranjos de pagamento', 'instituições de pagamento', 'transferências instantâneas',
+                   'contas de pagamento', 'Pix', 'iniciação de pagamento'],
+    'prudencial': ['requerimento de capital', 'gerenciamento de riscos', 'índice de liquidez',
+                   'patrimônio de referência', 'estrutura de governança', 'testes de estresse'],
+}
+CATEGORIES = tuple(SUBJECTS)
+
+SENTENCES = [
+    "Esta Resolução dispõe sobre {subject} no âmbito das instituições autorizadas a funcionar pelo Banco Central do Brasil.",
+    "As instituições de que trata o caput devem observar os critérios relativos a {subject}.",
+    "O disposto neste artigo aplica-se às {subject} realizadas a partir da data de entrada em vigor desta Resolução.",
+    "Fica o Banco Central do Brasil autorizado a baixar as normas complementares relativas a {subject}.",
+    "Para fins do disposto nesta Resolução, consideram-se {subject} aquelas definidas na regulamentação em vigor.",
+    "A documentação relativa a {subject} deve permanecer à disposição do Banco Central do Brasil pelo prazo de cinco anos.",
+    "É vedada a realização de {subject} em desacordo com o disposto nesta Resolução.",
+    "O descumprimento das disposições relativas a {subject} sujeita a instituição às sanções previstas na legislação.",
+]
+CLOSING = "Esta Resolução entra em vigor na data de sua publicação."
+
+def resolution_header(number, published):
+    return f"RESOLUÇÃO BCB Nº {number}, DE {published.day} DE {MONTHS[published.month - 1]} DE {published.year}"
+
+def _article(rng, index, subjects):
+    sentences = ' '.join(
+        rng.choice(SENTENCES).format(subject=rng.choice(subjects)) for _ in range(rng.randint(1, 4))
+    )
+    return f"Art. {index}º {sentences}"
+
+def generate_resolutions(size, seed=0):
+    """Yield ``size`` synthetic resolution records, in publication order."""
+    rng = random.Random(seed)
+    span_days = (LAST_DATE - FIRST_DATE).days
+    published_dates = sorted(FIRST_DATE + timedelta(days=rng.randint(0, span_days)) for _ in range(size))
+    collected_at = datetime(2025, 1, 1)
+    earlier = []
+
+    for number, published in enumerate(published_dates, start=1):
+        header = resolution_header(number, published)
+        if earlier and rng.random() < AMENDMENT_SHARE:
+            # Restate an earlier resolution with one article changed, as amendments do.
+            original = rng.choice(earlier)
+            category = original['category']
+            articles = original['articles'][:]
+            changed = rng.randrange(len(articles))
+            articles[changed] = _article(rng, changed + 1, SUBJECTS[category])
+        else:
+            category = rng.choice(CATEGORIES)
+            articles = [_article(rng, i, SUBJECTS[category]) for i in range(1, rng.randint(3, 12))]
+
+        if len(earlier) < 1000:
+            earlier.append({'category': category, 'articles': articles})
+        elif rng.random() < 0.01:
+            earlier[rng.randrange(len(earlier))] = {'category': category, 'articles': articles}
+
+        yield {
+            'title': f"Resolução BCB n° {number} de {published:%d/%m/%Y}",
+            'content': '\n'.join([header] + articles + [f"Art. {len(articles) + 1}º {CLOSING}"]),
+            'url': f"https://www.bcb.gov.br/estabilidadefinanceira/exibenormativo?tipo=Resolução BCB&numero={number}",
+            'publication_date': f"{published:%d/%m/%Y}",
+            'collection_date': (collected_at + timedelta(seconds=number)).isoformat(),
+            'category': category,
+        }
+
+def render_resolution_html(record):
+    """Resolution page with the markup parse_resolution_html reads."""
+    spans = ''.join(f"<p><span>{escape(line)}</span></p>" for line in record['content'].split('\n'))
+    return (
+        "<html><head><meta charset='utf-8'></head><body>"
+        f"<h2 class='titulo-pagina'>{escape(record['title'])}</h2>"
+        f"<div class='corpoNormativo'>{spans}</div>"
+        "</body></html>"
+    )
+
+def write_corpus(path, size, seed=0, html_dir=None):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if html_dir is not None:
+        Path(html_dir).mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, record in enumerate(generate_resolutions(size, seed)):
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            if html_dir is not None:
+                (Path(html_dir) / f"resolution_{i:06d}.html").write_text(render_resolution_html(record),
+                                                                       encoding='utf-8')
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, default=Path('data/synthetic') / RESOLUTIONS_FILE_NAME)
+    parser.add_argument('--html-dir', type=Path, help="Also save each resolution as a rendered HTML page.")
+    args = parser.parse_args()
+
+    path = write_corpus(args.output, args.size, args.seed, args.html_dir)
+    print(f"Wrote {args.size} synthetic resolutions to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import logging
+from datetime import datetime
+from pathlib import Path
+from data_analysis.complexity_analysis import METRIC_COLUMNS, metrics_fingerprint
+from pipeline.atomic import atomic_write
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_STORE_PATH = Path('data/analytics/resolutions')
+PREDICTIONS_PATH = Path('data/analytics/predictions.parquet')
+EXCERPT_LENGTH = 200
+PUBLICATION_DATE_FORMAT = '%d/%m/%Y'
+# Schema metadata key of the metric definitions the stored metrics were computed with; empty without metrics.
+METRICS_FINGERPRINT_KEY = b'metrics_fingerprint'
+
+def analytics_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ('url', pa.string()),
+            ('title', pa.string()),
+            ('publication_date', pa.date32()),
+            ('collection_date', pa.timestamp('us')),
+            ('content_length', pa.int32()),
+            ('excerpt', pa.string()),
+            ('category', pa.string()),
+        ]
+        + [(column, pa.float64()) for column in METRIC_COLUMNS]
+        + [
+            ('accuracy', pa.float64()),
+            ('year', pa.int16()),
+        ]
+    )
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([('year', pa.int16())]), flavor='hive')
+
+def _parse_date(value, date_format=None):
+    if not value:
+        return None
+    try:
+        if date_format:
+            return datetime.strptime(value.strip(), date_format)
+        return datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+def analytics_row(resolution, metrics=None, category=None, accuracy=None):
+    """
+    Flatten a collector record and its analysis results into one analytics row.
+
+    Dates are parsed once here, and only the length and a short excerpt of
+    the content are kept, so analysis stages never touch the full text.
+    """
+    content = resolution.get('content') or ''
+    publication_date = _parse_date(resolution.get('publication_date'), PUBLICATION_DATE_FORMAT)
+    row = {
+        'url': resolution.get('url'),
+        'title': resolution.get('title'),
+        'publication_date': publication_date.date() if publication_date else None,
+        'collection_date': _parse_date(resolution.get('collection_date')),
+        'content_length': len(content),
+        'excerpt': content[:EXCERPT_LENGTH],
+        'category': category if category is not None else resolution.get('category'),
+        'accuracy': accuracy,
+        'year': publication_date.year if publication_date else None
+    }
+    for column in METRIC_COLUMNS:
+        row[column] = (metrics or {}).get(column)
+    return row
+
+def write_analytics_store(rows, path=ANALYTICS_STORE_PATH):
+    """
+    Write analytics rows as a Parquet dataset partitioned by publication year.
+
+    The dataset is written next to the previous one and swapped in once
+    complete, with the fingerprint of the metric definitions in its schema
+    metadata when the rows carry metrics. Returns the number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    path = Path(path)
+    rows = list(rows)
+    has_metrics = any(row.get(column) is not None for row in rows for column in METRIC_COLUMNS)
+    schema = analytics_schema().with_metadata({METRICS_FINGERPRINT_KEY: metrics_fingerprint() if has_metrics else ''})
+    table = pa.Table.from_pylist(rows, schema=schema)
+
+    with atomic_write(path, directory=True) as tmp_path:
+        ds.write_dataset(table, tmp_path, format='parquet', partitioning=_partitioning(),
+                         existing_data_behavior='overwrite_or_ignore')
+
+    logger.info(f"Analytics store with {table.num_rows} resolutions written to {path}")
+    return table.num_rows
+
+def stored_metrics_fingerprint(path=ANALYTICS_STORE_PATH):
+    """Fingerprint of the metric definitions behind the store's metrics; '' without metrics, None if unknown."""
+    import pyarrow.dataset as ds
+
+    metadata = ds.dataset(path, format='parquet', partitioning=_partitioning()).schema.metadata or {}
+    value = metadata.get(METRICS_FINGERPRINT_KEY)
+    return value.decode('utf-8') if value is not None else None
+
+def read_analytics(columns, years=None, path=ANALYTICS_STORE_PATH, collected_after=None):
+    """
+    Read only ``columns`` of the analytics store into a DataFrame.
+
+    ``years`` restricts the read to those publication-year partitions; the
+    other partitions' files are never opened. ``collected_after`` keeps only
+    resolutions collected after that datetime, filtered while scanning.
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='parquet', partitioning=_partitioning())
+    filters = []
+    if years is not None:
+        filters.append(ds.field('year').isin(list(years)))
+    if collected_after is not None:
+        filters.append(ds.field('collection_date') > collected_after)
+    filter_expression = None
+    for expression in filters:
+        filter_expression = expression if filter_expression is None else filter_expression & expression
+    return dataset.to_table(columns=list(columns), filter=filter_expression).to_pandas()
+
+def build_analytics_store(data_path, path=ANALYTICS_STORE_PATH):
+    """Analytics store of raw collector records, without analysis results."""
+    from data_collection.resolution_records import iter_resolutions
+
+    return write_analytics_store((analytics_row(resolution) for resolution in iter_resolutions(data_path)), path)
+
+def write_predictions(urls, accuracy, path=PREDICTIONS_PATH):
+    """Write the per-resolution accuracy of the out-of-fold predictions, keyed by URL."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table({'url': pa.array(list(urls), pa.string()), 'accuracy': pa.array(accuracy, pa.float64())})
+    with atomic_write(path) as tmp_path:
+        pq.write_table(table, tmp_path)
+    return table.num_rows
+
+def read_predictions(path=PREDICTIONS_PATH):
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path, columns=['url', 'accuracy']).to_pandas().drop_duplicates('url')
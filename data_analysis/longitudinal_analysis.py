@@ -1,39 +1,37 @@
 import logging
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from datetime import datetime
 from pathlib import Path
-import json
+from data_analysis.analytics_store import ANALYTICS_STORE_PATH, build_analytics_store
+from data_analysis.trend_aggregates import AGGREGATES_PATH, TREND_METRICS, TrendAggregateStore
+from data_collection.resolution_records import RESOLUTIONS_FILE_NAME
 
 logger = logging.getLogger(__name__)
 
-def plot_trends(data_path):
-    try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            resolutions = json.load(f)
-
-        df = pd.DataFrame(resolutions)
-        
-        df['publication_date'] = df['publication_date'].str.strip()
-        df['publication_date'] = pd.to_datetime(df['publication_date'], format='%d/%m/%Y', errors='coerce')
+def plot_trends(store_path=ANALYTICS_STORE_PATH, years=None, granularity='year', aggregates_path=AGGREGATES_PATH):
+    """
+    Plot and report the trends of every metric at ``granularity`` (year, quarter or month).
 
-        df = df.dropna(subset=['publication_date'])
+    Newly collected resolutions are first folded into the stored trend
+    aggregates; the plot and report are then built from the aggregates alone.
+    """
+    aggregates = TrendAggregateStore(aggregates_path)
+    try:
+        aggregates.update(store_path)
 
-        if df.empty:
-            logger.error("No valid dates found. Please check the date format in the data.")
-            return
+        trends = {metric: aggregates.trends(metric, granularity, years=years) for metric in TREND_METRICS}
+        content_trend = trends['content_length']
 
-        df['year'] = df['publication_date'].dt.year
-        metrics_over_time = df.groupby('year').agg({
-            'content': lambda x: x.str.len().mean(),
-        }).reset_index()
+        if content_trend.empty:
+            raise ValueError("No valid dates found. Please check the date format in the data.")
 
         plt.figure(figsize=(10, 6))
-        sns.lineplot(data=metrics_over_time, x='year', y='content')
+        sns.lineplot(data=content_trend, x='period', y='mean')
         plt.title('Average Content Length Over Time')
-        plt.xlabel('Year')
+        plt.xlabel(granularity.capitalize())
         plt.ylabel('Average Content Length')
+        plt.xticks(rotation=45)
+        plt.tight_layout()
         plt.savefig('reports/longitudinal_trends.png')
         plt.close()
 
@@ -41,12 +39,19 @@ def plot_trends(data_path):
         
         with open('reports/longitudinal_trends_report.txt', 'w') as f:
             f.write("Longitudinal Trends Report\n")
-            f.write(metrics_over_time.to_string(index=False))
+            for metric, trend in trends.items():
+                f.write(f"\n{metric} by {granularity}\n")
+                f.write(trend.to_string(index=False))
+                f.write("\n")
     except Exception as e:
         logger.error(f"Error plotting trends: {e}")
+        raise
+    finally:
+        aggregates.close()
 
 if __name__ == "__main__":
     Path('reports').mkdir(parents=True, exist_ok=True)
     
-    data_path = Path(__file__).resolve().parent.parent / 'data/raw/resolutions_data.json'
-    plot_trends(data_path) 
\ No newline at end of file
+    if not ANALYTICS_STORE_PATH.exists():
+        build_analytics_store(Path(__file__).resolve().parent.parent / 'data/raw' / RESOLUTIONS_FILE_NAME)
+    plot_trends() 
\ No newline at end of file
@@ -1,16 +1,28 @@
 import logging
 import numpy as np
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
+from data_analysis.analytics_store import ANALYTICS_STORE_PATH, read_analytics, read_predictions
+from data_analysis.complexity_analysis import METRIC_COLUMNS
 
 logger = logging.getLogger(__name__)
 
-def analyze_complexity_vs_accuracy(complexity_metrics, accuracy_scores):
+def analyze_complexity_vs_accuracy(store_path=ANALYTICS_STORE_PATH, years=None, predictions_path=None):
+    """
+    Correlate the complexity metrics with the per-resolution model accuracy.
+
+    Accuracy is read from the analytics store, or from the predictions file
+    at ``predictions_path`` when the model is trained separately from the
+    store. Errors propagate to the caller.
+    """
     try:
-        df = pd.DataFrame(complexity_metrics)
-        df['accuracy'] = accuracy_scores
+        if predictions_path is None:
+            df = read_analytics(METRIC_COLUMNS + ['accuracy'], years=years, path=store_path)
+        else:
+            df = read_analytics(['url'] + METRIC_COLUMNS, years=years, path=store_path)
+            df = df.merge(read_predictions(predictions_path), on='url')[METRIC_COLUMNS + ['accuracy']]
+        df = df.dropna()
 
         correlation_matrix = df.corr()
         print("Correlation Matrix:")
@@ -30,6 +42,8 @@ def analyze_complexity_vs_accuracy(complexity_metrics, accuracy_scores):
             f.write(correlation_matrix.to_string())
     except Exception as e:
         logger.error(f"Error during statistical analysis: {e}")
+        raise
 
 if __name__ == "__main__":
     Path('reports').mkdir(parents=True, exist_ok=True)
+    analyze_complexity_vs_accuracy()
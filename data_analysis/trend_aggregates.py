@@ -0,0 +1,280 @@
+import json
+import logging
+import math
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from data_analysis.analytics_store import ANALYTICS_STORE_PATH, read_analytics, stored_metrics_fingerprint
+from data_analysis.complexity_analysis import METRIC_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES_PATH = Path('data/analytics/trend_aggregates.sqlite3')
+GRANULARITIES = ('year', 'quarter', 'month')
+TREND_METRICS = ['content_length'] + METRIC_COLUMNS
+UNCATEGORIZED = ''
+WATERMARK_KEY = 'collection_date_watermark'
+METRICS_FINGERPRINT_KEY = 'metrics_fingerprint'
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded relative error (DDSketch).
+
+    Values fall into logarithmic buckets whose width keeps every quantile
+    within ``relative_accuracy`` of the true value; negative values and zeros
+    get their own buckets. Two sketches merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01, positive=None, negative=None, zeros=0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.positive = positive or {}
+        self.negative = negative or {}
+        self.zeros = zeros
+
+    @property
+    def count(self):
+        return sum(self.positive.values()) + sum(self.negative.values()) + self.zeros
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        self.zeros += int((values == 0).sum())
+        for buckets, magnitudes in ((self.positive, values[values > 0]), (self.negative, -values[values < 0])):
+            keys, counts = np.unique(np.ceil(np.log(magnitudes) / math.log(self.gamma)), return_counts=True)
+            for key, count in zip(keys.astype(int).tolist(), counts.tolist()):
+                buckets[key] = buckets.get(key, 0) + count
+        return self
+
+    def merge(self, other):
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+        self.zeros += other.zeros
+        return self
+
+    def quantile(self, q):
+        total = self.count
+        if not total:
+            return float('nan')
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+    def _bucket_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def to_json(self):
+        return json.dumps({
+            'relative_accuracy': self.relative_accuracy,
+            'positive': self.positive,
+            'negative': self.negative,
+            'zeros': self.zeros
+        })
+
+    @classmethod
+    def from_json(cls, value):
+        state = json.loads(value)
+        return cls(
+            state['relative_accuracy'],
+            {int(key): count for key, count in state['positive'].items()},
+            {int(key): count for key, count in state['negative'].items()},
+            state['zeros']
+        )
+
+def period_labels(dates, granularity):
+    """Period label of each publication date: ``2023``, ``2023-Q4`` or ``2023-11``."""
+    dates = dates.dt
+    if granularity == 'year':
+        return dates.year.astype(str)
+    if granularity == 'quarter':
+        return dates.year.astype(str) + '-Q' + dates.quarter.astype(str)
+    if granularity == 'month':
+        return dates.strftime('%Y-%m')
+    raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}")
+
+class TrendAggregateStore:
+    """
+    SQLite store of per-period partial aggregates of the trend metrics.
+
+    For every granularity, period, category and metric it keeps the count,
+    sum, sum of squares, min, max and a QuantileSketch, all of which merge
+    exactly, so new resolutions are folded in without revisiting old ones.
+    A watermark on ``collection_date`` records what has been aggregated, and
+    the fingerprint of the store's metric definitions what it was computed
+    with: when the store's fingerprint differs (the metrics were redefined,
+    or rows were first aggregated before they had metrics), the aggregates
+    are rebuilt from scratch.
+    """
+
+    def __init__(self, path=AGGREGATES_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS aggregates (
+                granularity TEXT NOT NULL,
+                period TEXT NOT NULL,
+                category TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                sum REAL NOT NULL,
+                sum_squares REAL NOT NULL,
+                min REAL NOT NULL,
+                max REAL NOT NULL,
+                sketch TEXT NOT NULL,
+                PRIMARY KEY (granularity, period, category, metric)
+            );
+            CREATE TABLE IF NOT EXISTS aggregate_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM aggregate_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def watermark(self):
+        value = self._meta(WATERMARK_KEY)
+        return datetime.fromisoformat(value) if value else None
+
+    def reset(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM aggregates")
+            self._conn.execute("DELETE FROM aggregate_meta")
+
+    def update(self, store_path=ANALYTICS_STORE_PATH):
+        """
+        Fold resolutions collected after the watermark into the aggregates.
+
+        Only those rows are read from the analytics store, so the cost of a
+        refresh is proportional to the newly collected data. Returns the
+        number of resolutions aggregated.
+        """
+        fingerprint = stored_metrics_fingerprint(store_path) or ''
+        if fingerprint != self._meta(METRICS_FINGERPRINT_KEY):
+            if self._meta(METRICS_FINGERPRINT_KEY) is not None:
+                logger.info("The metrics of the analytics store changed; rebuilding the trend aggregates.")
+            self.reset()
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO aggregate_meta (key, value) VALUES (?, ?)", (METRICS_FINGERPRINT_KEY, fingerprint)
+                )
+
+        df = read_analytics(
+            ['publication_date', 'collection_date', 'category'] + TREND_METRICS,
+            path=store_path, collected_after=self.watermark
+        )
+        if df.empty:
+            logger.info("Trend aggregates are up to date.")
+            return 0
+
+        # Records without a collection date can only be picked up by the first refresh.
+        collected = df['collection_date'].dropna()
+        new_watermark = collected.max().to_pydatetime() if not collected.empty else datetime.min
+        df = df.dropna(subset=['publication_date'])
+        df['publication_date'] = df['publication_date'].astype('datetime64[ns]')
+        df['category'] = df['category'].fillna(UNCATEGORIZED)
+        with self._conn:
+            for granularity in GRANULARITIES:
+                df['period'] = period_labels(df['publication_date'], granularity)
+                for metric in TREND_METRICS:
+                    self._merge_partials(granularity, metric, df[['period', 'category', metric]].dropna())
+            self._conn.execute(
+                "INSERT OR REPLACE INTO aggregate_meta (key, value) VALUES (?, ?)",
+                (WATERMARK_KEY, max(new_watermark, self.watermark or datetime.min).isoformat())
+            )
+
+        logger.info(f"Folded {len(df)} newly collected resolutions into the trend aggregates.")
+        return len(df)
+
+    def _merge_partials(self, granularity, metric, df):
+        values = df[metric]
+        partials = df.assign(squares=values * values).groupby(['period', 'category']).agg(
+            count=(metric, 'size'),
+            sum=(metric, 'sum'),
+            sum_squares=('squares', 'sum'),
+            min=(metric, 'min'),
+            max=(metric, 'max')
+        )
+        groups = df.groupby(['period', 'category'])[metric]
+
+        for (period, category), partial in partials.iterrows():
+            key = (granularity, period, category, metric)
+            sketch = QuantileSketch().add(groups.get_group((period, category)).to_numpy())
+            row = self._conn.execute(
+                "SELECT count, sum, sum_squares, min, max, sketch FROM aggregates "
+                "WHERE granularity = ? AND period = ? AND category = ? AND metric = ?", key
+            ).fetchone()
+            count, total, sum_squares = int(partial['count']), partial['sum'], partial['sum_squares']
+            low, high = partial['min'], partial['max']
+            if row is not None:
+                count += row[0]
+                total += row[1]
+                sum_squares += row[2]
+                low, high = min(low, row[3]), max(high, row[4])
+                sketch.merge(QuantileSketch.from_json(row[5]))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO aggregates "
+                "(granularity, period, category, metric, count, sum, sum_squares, min, max, sketch) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                key + (count, float(total), float(sum_squares), float(low), float(high), sketch.to_json())
+            )
+
+    def trends(self, metric, granularity='year', categories=None, years=None, quantiles=(0.5, 0.9)):
+        """
+        Per-period statistics of ``metric`` as a DataFrame.
+
+        Partials of the selected ``categories`` (all of them by default) are
+        merged per period; ``years`` keeps only periods of those years.
+        """
+        import pandas as pd
+
+        query = ("SELECT period, count, sum, sum_squares, min, max, sketch, category FROM aggregates "
+                 "WHERE granularity = ? AND metric = ? ORDER BY period")
+        merged = {}
+        for period, count, total, sum_squares, low, high, sketch, category in self._conn.execute(
+            query, (granularity, metric)
+        ):
+            if categories is not None and category not in categories:
+                continue
+            if years is not None and int(period[:4]) not in years:
+                continue
+            if period not in merged:
+                merged[period] = [0, 0.0, 0.0, low, high, QuantileSketch()]
+            partial = merged[period]
+            partial[0] += count
+            partial[1] += total
+            partial[2] += sum_squares
+            partial[3], partial[4] = min(partial[3], low), max(partial[4], high)
+            partial[5].merge(QuantileSketch.from_json(sketch))
+
+        rows = []
+        for period, (count, total, sum_squares, low, high, sketch) in merged.items():
+            mean = total / count
+            variance = max(sum_squares / count - mean * mean, 0.0) * count / (count - 1) if count > 1 else 0.0
+            row = {'period': period, 'count': count, 'mean': mean, 'std': math.sqrt(variance), 'min': low, 'max': high}
+            for q in quantiles:
+                row[f'p{int(q * 100)}'] = sketch.quantile(q)
+            rows.append(row)
+        return pd.DataFrame(rows, columns=['period', 'count', 'mean', 'std', 'min', 'max']
+                            + [f'p{int(q * 100)}' for q in quantiles])
+
+    def close(self):
+        self._conn.close()
@@ -1,33 +1,109 @@
 import logging
 import random
-import json
+from datetime import datetime
 from pathlib import Path
+from data_collection.content_validator import validate_resolution_content
+from data_collection.resolution_records import RESOLUTIONS_FILE_NAME, iter_resolutions
 
 logger = logging.getLogger(__name__)
 
-def validate_sample(data_path, sample_size=0.1):
+DEFAULT_SEED = 42
+REPORT_PATH = Path('reports/sample_validation_report.txt')
+SAMPLE_FIELDS = ('title', 'content', 'url', 'publication_date', 'category')
+STRATA = ('year', 'category')
+
+class Reservoir:
+    """Uniform sample of at most ``size`` items from a stream of unknown length (Algorithm R)."""
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.seen = 0
+        self.items = []
+
+    def offer(self, item):
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+            return
+        slot = self.rng.randrange(self.seen)
+        if slot < self.size:
+            self.items[slot] = item
+
+def resolution_stratum(resolution, stratify_by):
+    if stratify_by == 'year':
+        try:
+            return str(datetime.strptime((resolution['publication_date'] or '').strip(), '%d/%m/%Y').year)
+        except ValueError:
+            return 'unknown'
+    if stratify_by == 'category':
+        return resolution['category'] or 'uncategorized'
+    raise ValueError(f"Unknown stratum '{stratify_by}', expected one of {STRATA}")
+
+def sample_resolutions(resolutions, sample_size, seed=DEFAULT_SEED, stratify_by=None):
+    """
+    Reservoir-sample a stream of resolutions in a single pass.
+
+    Without ``stratify_by`` the result holds at most ``sample_size``
+    resolutions; with it, up to ``sample_size`` per year or category. Only
+    the sampled records are kept in memory, and the same seed over the same
+    input always yields the same sample. Returns a dict mapping each stratum
+    (``None`` when not stratified) to its reservoir.
+    """
+    rng = random.Random(seed)
+    reservoirs = {}
+    for resolution in resolutions:
+        stratum = resolution_stratum(resolution, stratify_by) if stratify_by else None
+        if stratum not in reservoirs:
+            reservoirs[stratum] = Reservoir(sample_size, rng)
+        reservoirs[stratum].offer(resolution)
+    return reservoirs
+
+def validate_sample(data_path, sample_size=100, seed=DEFAULT_SEED, stratify_by=None, report_path=REPORT_PATH):
+    """
+    Check a reproducible sample of the collected resolutions against the content rules.
+
+    Records are streamed from ``data_path`` and reservoir-sampled, so memory
+    stays proportional to the sample size. Returns the number of sampled
+    resolutions that failed validation.
+    """
     try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            resolutions = json.load(f)
-        
-        sample = random.sample(resolutions, int(len(resolutions) * sample_size))
-        
-        with open('reports/sample_validation_report.txt', 'w') as f:
-            for i, resolution in enumerate(sample):
-                report = (
-                    f"Sample {i+1}:\n"
-                    f"Title: {resolution['title']}\n"
-                    f"Content: {resolution['content'][:200]}...\n"
-                    f"URL: {resolution['url']}\n"
-                    "-" * 40 + "\n"
-                )
-                print(report)
-                f.write(report)
-
-        logger.info("Sample validation completed successfully.")
+        reservoirs = sample_resolutions(
+            iter_resolutions(data_path, fields=SAMPLE_FIELDS), sample_size, seed, stratify_by
+        )
+
+        invalid = 0
+        sampled = 0
+        Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(f"Sample validation (seed={seed}, sample_size={sample_size}, stratify_by={stratify_by})\n")
+            for stratum in sorted(reservoirs, key=str):
+                reservoir = reservoirs[stratum]
+                if stratify_by:
+                    f.write(f"\n{stratify_by} {stratum}: {len(reservoir.items)} of {reservoir.seen} resolutions\n")
+                for resolution in reservoir.items:
+                    sampled += 1
+                    errors = validate_resolution_content(resolution['content'] or '')
+                    invalid += bool(errors)
+                    report = (
+                        f"Sample {sampled}:\n"
+                        f"Title: {resolution['title']}\n"
+                        f"Content: {(resolution['content'] or '')[:200]}...\n"
+                        f"URL: {resolution['url']}\n"
+                        f"Validation: {'; '.join(errors) if errors else 'OK'}\n"
+                        + "-" * 40 + "\n"
+                    )
+                    if errors:
+                        logger.warning(f"Sampled resolution {resolution['url']} failed validation: {'; '.join(errors)}")
+                    f.write(report)
+
+        logger.info(f"Sample validation completed: {invalid} of {sampled} sampled resolutions failed, "
+                    f"report written to {report_path}")
+        return invalid
     except Exception as e:
         logger.error(f"Error during sample validation: {e}")
 
 if __name__ == "__main__":
-    data_path = Path(__file__).resolve().parent.parent / 'data/raw/resolutions_data.json'
-    validate_sample(data_path) 
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    data_path = Path(__file__).resolve().parent.parent / 'data/raw' / RESOLUTIONS_FILE_NAME
+    validate_sample(data_path)
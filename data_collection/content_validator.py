@@ -1,55 +1,273 @@
+import json
 import logging
+import re
+import numpy as np
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
 from pathlib import Path
-from typing import List, Dict
-from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+from dataclasses import asdict, dataclass, field
+from data_collection.crawl_state import content_hash
+from data_mining.near_duplicates import DEFAULT_THRESHOLD, MinHasher, NearDuplicateIndex, shingles
+from data_mining.preprocessing import HEADER_PATTERN, normalizer
+from pipeline.atomic import atomic_write
+
+MIN_CONTENT_LENGTH = 100
+VALIDATION_RESULTS_PATH = Path("reports/content_validation.jsonl")
+DUPLICATE_RULE = "duplicate_content"
+NEAR_DUPLICATE_RULE = "near_duplicate"
+
+# Sequences left behind when UTF-8 Portuguese text is decoded as Latin-1 (e.g. "Ã§" for "ç").
+MOJIBAKE_PATTERN = re.compile("Ã[\u0080-¿]|Â[\u0080-¿]")
+HEADER_DATE_PATTERN = re.compile(r"RESOLUÇÃO BCB Nº \d+, DE (\d+) DE (\w+) DE (\d+)")
+PORTUGUESE_MONTHS = {
+    "JANEIRO": 1, "FEVEREIRO": 2, "MARÇO": 3, "ABRIL": 4, "MAIO": 5, "JUNHO": 6,
+    "JULHO": 7, "AGOSTO": 8, "SETEMBRO": 9, "OUTUBRO": 10, "NOVEMBRO": 11, "DEZEMBRO": 12,
+}
+
+VALIDATION_RULES: Dict[str, Callable[[str], Optional[str]]] = {}
 
 @dataclass
 class ResolutionValidationResult:
     file_name: str
     is_valid: bool
     validation_errors: List[str]
+    content_hash: Optional[str] = None
+    failed_rules: List[str] = field(default_factory=list)
+    near_duplicate_of: Optional[str] = None
+    # Set when the MinHash signature could not be computed; the file is then left out of near-duplicate detection.
+    signature_error: Optional[str] = None
+    # MinHash signature used for near-duplicate detection; not written with the results.
+    signature: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+
+def register_validation_rule(name: str):
+    """Register a content rule: a function returning an error message, or None when the content passes."""
+    def decorator(rule):
+        VALIDATION_RULES[name] = rule
+        return rule
+    return decorator
+
+@register_validation_rule("not_empty")
+def check_not_empty(content: str) -> Optional[str]:
+    if not content.strip():
+        return "Resolution file is empty or contains only whitespace"
+    return None
+
+@register_validation_rule("min_length")
+def check_min_length(content: str) -> Optional[str]:
+    if len(content) < MIN_CONTENT_LENGTH:
+        return f"Resolution content too short (minimum {MIN_CONTENT_LENGTH} characters)"
+    return None
+
+@register_validation_rule("encoding")
+def check_encoding(content: str) -> Optional[str]:
+    if "�" in content:
+        return "Resolution content contains undecodable characters"
+    if MOJIBAKE_PATTERN.search(content):
+        return "Resolution content looks double-encoded (UTF-8 read as Latin-1)"
+    return None
+
+@register_validation_rule("header")
+def check_header(content: str) -> Optional[str]:
+    if not re.search(HEADER_PATTERN, content):
+        return "Resolution header (RESOLUÇÃO BCB Nº ..., DE ...) not found"
+    return None
+
+@register_validation_rule("date")
+def check_date(content: str) -> Optional[str]:
+    match = HEADER_DATE_PATTERN.search(content)
+    if match is None:
+        return None  # Reported by the header rule
+    day, month, year = match.groups()
+    try:
+        date(int(year), PORTUGUESE_MONTHS[month.upper()], int(day))
+    except (KeyError, ValueError):
+        return f"Resolution date '{day} DE {month} DE {year}' is not a valid date"
+    return None
 
-def validate_resolution_content(content: str) -> List[str]:
+def validate_resolution_content(content: str, rules: Optional[Iterable[str]] = None) -> List[str]:
     """
     Validate the content of a resolution file.
-    
+
     Args:
         content: The text content of the resolution file
-        
+        rules: Names of the registered rules to apply, all of them by default
+
     Returns:
         List of validation error messages, empty if content is valid
     """
-    validation_errors = []
-    
-    if len(content) < 100:
-        validation_errors.append("Resolution content too short (minimum 100 characters)")
-    if not content.strip():
-        validation_errors.append("Resolution file is empty or contains only whitespace")
-        
-    return validation_errors
+    return [error for _, error in _apply_rules(content, rules)]
+
+def _apply_rules(content: str, rules: Optional[Iterable[str]] = None) -> List[tuple]:
+    failures = []
+    for name in rules if rules is not None else VALIDATION_RULES:
+        error = VALIDATION_RULES[name](content)
+        if error:
+            failures.append((name, error))
+    return failures
+
+def validate_resolution_file(resolution_file: Path, rules: Optional[Iterable[str]] = None,
+                             with_signature: bool = False) -> ResolutionValidationResult:
+    """
+    Apply the content rules to one file; runs in the validation worker processes.
+
+    With ``with_signature``, the MinHash signature of the content is attached
+    for near-duplicate detection; it is not part of the written results.
+    """
+    try:
+        raw = resolution_file.read_bytes()
+        failures = []
+        try:
+            content = raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            failures.append(("encoding", f"Resolution file is not valid UTF-8: {e}"))
+            content = raw.decode("utf-8", errors="replace")
+            rules = [name for name in (rules if rules is not None else VALIDATION_RULES) if name != "encoding"]
+        failures.extend(_apply_rules(content, rules))
+
+        result = ResolutionValidationResult(
+            file_name=str(resolution_file),
+            is_valid=not failures,
+            validation_errors=[error for _, error in failures],
+            content_hash=content_hash(content),
+            failed_rules=[name for name, _ in failures]
+        )
+    except Exception as e:
+        return ResolutionValidationResult(
+            file_name=str(resolution_file),
+            is_valid=False,
+            validation_errors=[f"Error reading resolution file: {str(e)}"],
+            failed_rules=["read"]
+        )
 
-def validate_resolution_content(resolutions_dir: Path) -> Dict[str, ResolutionValidationResult]:
+    if with_signature:
+        try:
+            result.signature = MinHasher().signature(shingles(content))
+        except Exception as e:
+            result.signature_error = f"Could not compute the MinHash signature: {e}"
+    return result
+
+def _init_validation_worker(rules: Dict[str, Callable[[str], Optional[str]]], stop_words=None) -> None:
+    # Rules registered by the caller reach workers that did not import its module.
+    VALIDATION_RULES.update(rules)
+    # Workers reuse the stop words loaded by the parent instead of each looking them up (or downloading them).
+    if stop_words is not None:
+        normalizer.stop_words = stop_words
+
+def flag_duplicate_content(results: Iterable[ResolutionValidationResult]) -> int:
+    """Mark every file whose content hash was already seen in an earlier file; returns how many."""
+    by_hash = defaultdict(list)
+    for result in results:
+        if result.content_hash is not None:
+            by_hash[result.content_hash].append(result)
+
+    duplicates = 0
+    for same_content in by_hash.values():
+        original = same_content[0]
+        for result in same_content[1:]:
+            result.is_valid = False
+            result.validation_errors.append(f"Duplicate content of {original.file_name}")
+            result.failed_rules.append(DUPLICATE_RULE)
+            duplicates += 1
+    return duplicates
+
+def flag_near_duplicates(results: Iterable[ResolutionValidationResult], threshold: float = DEFAULT_THRESHOLD) -> int:
+    """
+    Mark files that restate an earlier file, using an in-memory MinHash/LSH index.
+
+    Exact duplicates are already flagged and are skipped. Returns how many
+    near-duplicates were found.
+    """
+    index = NearDuplicateIndex(":memory:", threshold=threshold)
+    near_duplicates = 0
+    try:
+        for result in results:
+            signature = result.signature
+            if signature is None or DUPLICATE_RULE in result.failed_rules:
+                continue
+            matches = index.query(signature=signature)
+            index.add(result.file_name, signature=signature)
+            if matches:
+                original, similarity = matches[0]
+                result.is_valid = False
+                result.near_duplicate_of = original
+                result.validation_errors.append(f"Near-duplicate of {original} (similarity {similarity:.2f})")
+                result.failed_rules.append(NEAR_DUPLICATE_RULE)
+                near_duplicates += 1
+    finally:
+        index.close()
+    return near_duplicates
+
+def write_validation_results(results: Iterable[ResolutionValidationResult], path: Path = VALIDATION_RESULTS_PATH) -> None:
+    """Write one JSON line per file, replacing the previous results once complete."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(path) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+        for result in results:
+            record = asdict(result)
+            del record["signature"]
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def validate_resolution_directory(
+    resolutions_dir: Path,
+    max_workers: Optional[int] = None,
+    results_path: Optional[Path] = VALIDATION_RESULTS_PATH,
+    chunksize: int = 64,
+    detect_near_duplicates: bool = True,
+    rules: Optional[Iterable[str]] = None,
+) -> Dict[str, ResolutionValidationResult]:
+    """
+    Validate every ``.txt`` file under ``resolutions_dir`` on a process pool.
+
+    Files are validated in chunks on ``max_workers`` processes (all cores by
+    default); duplicate content is detected afterwards from the content
+    hashes, and near-duplicates from MinHash signatures through an LSH
+    index, without comparing files pairwise. Results are written as JSON
+    Lines to ``results_path`` and returned keyed by file name.
+
+    ``rules`` names the registered rules to apply, all of them by default.
+    Rules registered outside this module are passed to the workers, so they
+    must be module-level functions.
+    """
     logger = logging.getLogger(__name__)
     logger.info("Starting resolution content validation...")
-    
-    validation_results = {}
-    
-    for resolution_file in resolutions_dir.glob("*.txt"):
+
+    rules = list(rules) if rules is not None else list(VALIDATION_RULES)
+    unknown = [name for name in rules if name not in VALIDATION_RULES]
+    if unknown:
+        raise ValueError(f"Unknown validation rules {unknown}, expected some of {list(VALIDATION_RULES)}")
+
+    resolution_files = sorted(Path(resolutions_dir).rglob("*.txt"))
+    stop_words = None
+    if detect_near_duplicates:
         try:
-            content = resolution_file.read_text(encoding="utf-8")
-            validation_errors = validate_resolution_content(content)
-            
-            validation_results[resolution_file.name] = ResolutionValidationResult(
-                file_name=resolution_file.name,
-                is_valid=len(validation_errors) == 0,
-                validation_errors=validation_errors
-            )
-            
+            stop_words = normalizer.stop_words
         except Exception as e:
-            validation_results[resolution_file.name] = ResolutionValidationResult(
-                file_name=resolution_file.name,
-                is_valid=False,
-                validation_errors=[f"Error reading resolution file: {str(e)}"]
-            )
-    
-    return validation_results 
\ No newline at end of file
+            logger.error(f"Stop words unavailable, near-duplicate detection disabled: {e}")
+            detect_near_duplicates = False
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_validation_worker,
+                             initargs=({name: VALIDATION_RULES[name] for name in rules}, stop_words)) as executor:
+        results = list(executor.map(
+            partial(validate_resolution_file, rules=rules, with_signature=detect_near_duplicates),
+            resolution_files, chunksize=chunksize
+        ))
+
+    duplicates = flag_duplicate_content(results)
+    if detect_near_duplicates:
+        duplicates += flag_near_duplicates(results)
+    if results_path is not None:
+        write_validation_results(results, results_path)
+
+    invalid = sum(not result.is_valid for result in results)
+    signature_errors = sum(result.signature_error is not None for result in results)
+    if signature_errors:
+        logger.warning(f"{signature_errors} files were left out of near-duplicate detection: "
+                       f"their MinHash signature could not be computed")
+    logger.info(
+        f"Validated {len(results)} resolution files: {invalid} invalid, {duplicates} duplicates"
+        + (f", results written to {results_path}" if results_path is not None else "")
+    )
+    return {result.file_name: result for result in results}
@@ -0,0 +1,100 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Set
+
+STATUS_PENDING = "pending"
+STATUS_FETCHED = "fetched"
+STATUS_FAILED = "failed"
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+class CrawlStateStore:
+    """
+    SQLite store keyed by resolution URL, tracking fetch status and content hash.
+
+    Every state change is committed immediately so an interrupted crawl can be
+    resumed from where it stopped.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS resolutions (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                content_hash TEXT,
+                error TEXT,
+                discovered_at TEXT NOT NULL,
+                fetched_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS crawl_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def known_urls(self, urls: Iterable[str]) -> Set[str]:
+        urls = list(urls)
+        if not urls:
+            return set()
+        placeholders = ",".join("?" * len(urls))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT url FROM resolutions WHERE url IN ({placeholders})", urls
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_discovered(self, urls: Iterable[str]) -> None:
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO resolutions (url, status, discovered_at) VALUES (?, ?, ?)",
+                [(url, STATUS_PENDING, now) for url in urls],
+            )
+
+    def mark_fetched(self, url: str, content: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE resolutions SET status = ?, content_hash = ?, error = NULL, fetched_at = ? WHERE url = ?",
+                (STATUS_FETCHED, content_hash(content), datetime.now().isoformat(), url),
+            )
+
+    def mark_failed(self, url: str, error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE resolutions SET status = ?, error = ? WHERE url = ?",
+                (STATUS_FAILED, error, url),
+            )
+
+    def unfinished_urls(self) -> List[str]:
+        """URLs discovered by an earlier run that were never fetched successfully."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM resolutions WHERE status != ? ORDER BY discovered_at", (STATUS_FETCHED,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_meta(self, key: str, default: str = "") -> str:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM crawl_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO crawl_meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,145 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional, Protocol
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from lxml import etree, html
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
+
+NORMATIVE_API_URL = "https://www.bcb.gov.br/api/conteudo/app/normativos/exibenormativo"
+REQUEST_TIMEOUT = 20
+
+@dataclass
+class ResolutionPage:
+    title: str
+    content: str
+
+def parse_resolution_html(page: str) -> Optional[ResolutionPage]:
+    """Extract the title and body spans from a rendered resolution page."""
+    tree = html.fromstring(page)
+    title_elements = tree.xpath("//*[contains(concat(' ', normalize-space(@class), ' '), ' titulo-pagina ')]")
+    content_elements = tree.xpath("//div[@class='corpoNormativo']//span")
+
+    if not title_elements or not content_elements:
+        return None
+
+    return ResolutionPage(
+        title=title_elements[0].text_content().strip(),
+        content="\n".join(span.text_content().strip() for span in content_elements)
+    )
+
+def parse_resolution_json(payload: dict) -> Optional[ResolutionPage]:
+    """Extract the title and body from the normative API response."""
+    items = payload.get("conteudo") if isinstance(payload, dict) else None
+    if not items:
+        return None
+
+    item = items[0]
+    title = (item.get("Titulo") or "").strip()
+    body = item.get("Texto") or ""
+    if not title or not body:
+        return None
+
+    fragment = html.fromstring(f"<div>{body}</div>")
+    spans = fragment.xpath("//span")
+    if spans:
+        content = "\n".join(span.text_content().strip() for span in spans)
+    else:
+        content = fragment.text_content().strip()
+
+    return ResolutionPage(title=title, content=content)
+
+class RateLimiter(Protocol):
+    def wait(self, url: str) -> None: ...
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    HTTP adapter that waits for the rate limiter before every attempt of a request.
+
+    Retries run here instead of inside urllib3, so the retries of ``retry``
+    are rate limited like first attempts. A request that still fails once
+    the retries are spent raises its last error or returns its last response.
+    """
+
+    def __init__(self, retry: Retry, rate_limiter: Optional[RateLimiter] = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+
+    def send(self, request, **kwargs):
+        retry = self.retry
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.wait(request.url)
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                try:
+                    retry = retry.increment(request.method, request.url, error=e)
+                except MaxRetryError:
+                    raise e
+                retry.sleep()
+                continue
+
+            if not retry.is_retry(request.method, response.status_code, "Retry-After" in response.headers):
+                return response
+            try:
+                retry = retry.increment(request.method, request.url, response=response.raw)
+            except MaxRetryError:
+                return response
+            retry.sleep(response.raw)
+            response.close()
+
+class HttpResolutionFetcher:
+    """
+    Fetch resolutions over a pooled HTTP session instead of a browser.
+
+    The normative JSON API is tried first, then the static HTML page. ``fetch``
+    returns None when neither yields the resolution, so the caller can fall
+    back to Selenium for pages that need JavaScript. With a ``rate_limiter``,
+    every request it sends, retries included, waits for it first.
+    """
+
+    def __init__(self, pool_size: int = 4, api_url: str = NORMATIVE_API_URL,
+                 rate_limiter: Optional[RateLimiter] = None) -> None:
+        self.api_url = api_url
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        adapter = RateLimitedAdapter(retry, rate_limiter, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, resolution_url: str) -> Optional[ResolutionPage]:
+        try:
+            page = self._fetch_json(resolution_url)
+            if page is None:
+                page = self._fetch_html(resolution_url)
+            return page
+        except (requests.RequestException, ValueError, etree.LxmlError) as e:
+            logging.warning(f"HTTP fetch failed for {resolution_url}: {e}")
+            return None
+
+    def _fetch_json(self, resolution_url: str) -> Optional[ResolutionPage]:
+        query = parse_qs(urlparse(resolution_url).query)
+        if "tipo" not in query or "numero" not in query:
+            return None
+
+        response = self.session.get(
+            self.api_url,
+            params={"p1": query["tipo"][0], "p2": query["numero"][0]},
+            timeout=REQUEST_TIMEOUT
+        )
+        if response.status_code != 200 or "json" not in response.headers.get("Content-Type", ""):
+            return None
+        return parse_resolution_json(response.json())
+
+    def _fetch_html(self, resolution_url: str) -> Optional[ResolutionPage]:
+        response = self.session.get(resolution_url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return parse_resolution_html(response.text)
+
+    def close(self) -> None:
+        self.session.close()
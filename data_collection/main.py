@@ -1,7 +1,9 @@
+import argparse
 import logging
 from pathlib import Path
 from data_collection.resolution_collector import collect_central_bank_resolutions
-from data_collection.content_validator import validate_resolution_content
+from data_collection.content_validator import VALIDATION_RULES, validate_resolution_directory
+from pipeline import instrumentation
 
 def configure_logging() -> None:
     logging.basicConfig(
@@ -23,24 +25,39 @@ def initialize_directories() -> tuple[Path, Path]:
     
     return raw_data_dir, processed_data_dir
 
-def main() -> None:
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Collect and validate the Central Bank resolutions.")
+    parser.add_argument("--run-summary", type=Path,
+                        help="Where to write the JSON run summary (default: reports/run_summaries/).")
+    parser.add_argument("--profile", type=Path, help="Run under cProfile and write the stats to this path.")
+    parser.add_argument("--rules", nargs="+", choices=list(VALIDATION_RULES),
+                        help="Content validation rules to apply (default: all of them).")
+    return parser.parse_args(argv)
 
+def main(argv=None) -> None:
+    args = parse_args(argv)
     configure_logging()
     logger = logging.getLogger(__name__)
+    run = instrumentation.start_run("collection")
     
     try:
         logger.info("Initiating Central Bank resolutions collection process...")
         
         raw_data_dir, processed_data_dir = initialize_directories()
         
-        collect_central_bank_resolutions(raw_data_dir)
-        validation_results = validate_resolution_content(processed_data_dir)
+        with instrumentation.profiled(args.profile):
+            with instrumentation.span("collection"):
+                collect_central_bank_resolutions(raw_data_dir)
+            with instrumentation.span("validation"):
+                validation_results = validate_resolution_directory(processed_data_dir, rules=args.rules)
+        instrumentation.count("files_validated", len(validation_results))
         
         for file_result in validation_results.values():
             if not file_result.is_valid:
+                instrumentation.count("files_invalid")
                 logger.warning(
                     f"Content validation failed for {file_result.file_name}: "
-                    f"{', '.join(file_result.errors)}"
+                    f"{', '.join(file_result.validation_errors)}"
                 )
         
         logger.info("Resolution collection process completed successfully")
@@ -48,6 +65,8 @@ def main() -> None:
     except Exception as e:
         logger.error("Critical error in resolution collection process", exc_info=True)
         raise
+    finally:
+        run.write_summary(args.run_summary)
 
 if __name__ == "__main__":
     main()
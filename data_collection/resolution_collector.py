@@ -1,16 +1,35 @@
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, List, Optional
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException
 import logging
-import os
-import json
-from urllib.parse import urlencode
+import queue
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlparse
+from data_collection.crawl_state import CrawlStateStore
+from data_collection.http_fetcher import HttpResolutionFetcher
+from data_collection.resolution_records import RESOLUTIONS_FILE_NAME, ResolutionRecordWriter, iter_resolutions
+from data_mining.near_duplicates import NearDuplicateIndex
+from data_mining.preprocessing import normalizer
+from pipeline import instrumentation
+
+SEARCH_URL = "https://www.bcb.gov.br/estabilidadefinanceira/buscanormas"
+SEARCH_PAGE_SIZE = 15
+STATE_DB_NAME = "crawl_state.sqlite3"
+FULL_CRAWL_COMPLETED = "full_crawl_completed"
+FETCH_BACKENDS = ("http", "selenium")
+NEAR_DUPLICATES_DB_NAME = "near_duplicates.sqlite3"
+SEARCH_PAGE_ATTEMPTS = 2
 
 @dataclass
 class CentralBankResolution:
@@ -19,6 +38,7 @@ class CentralBankResolution:
     url: str
     publication_date: str
     collection_date: str
+    near_duplicate_of: Optional[str] = None
 
 def setup_chrome_driver() -> webdriver.Chrome:
     chrome_options = Options()
@@ -32,6 +52,72 @@ def setup_chrome_driver() -> webdriver.Chrome:
     service = Service("/usr/local/bin/chromedriver")
     return webdriver.Chrome(service=service, options=chrome_options)
 
+class HostRateLimiter:
+    """Enforce a minimum interval between requests sent to the same host."""
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url: str) -> None:
+        if not self.min_interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class ChromeDriverPool:
+    """Bounded pool of reusable headless Chrome drivers, created on first use."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._idle = queue.Queue()
+        self._created = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self) -> Iterator[webdriver.Chrome]:
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            self._idle.put(driver)
+
+    def _acquire(self) -> webdriver.Chrome:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._created) < self.size:
+                driver = setup_chrome_driver()
+                self._created.append(driver)
+                return driver
+        return self._idle.get()
+
+    def close(self) -> None:
+        with self._lock:
+            for driver in self._created:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    logging.warning(f"Error closing Chrome driver: {e}")
+            self._created.clear()
+
+def build_resolution(title: str, content: str, resolution_url: str) -> CentralBankResolution:
+    return CentralBankResolution(
+        title=title,
+        content=content,
+        url=resolution_url,
+        publication_date=title[-10:],
+        collection_date=datetime.now().isoformat()
+    )
+
 def extract_resolution_data(driver: webdriver.Chrome, resolution_url: str) -> Optional[CentralBankResolution]:
     try:
         driver.get(resolution_url)
@@ -45,68 +131,195 @@ def extract_resolution_data(driver: webdriver.Chrome, resolution_url: str) -> Op
             logging.error(f"Missing elements on page: {resolution_url}")
             return None
 
-        title = title_element.text
-        content = "\n".join(p.text for p in content_elements)
-        publication_date = title[-10:]
-
-        return CentralBankResolution(
-            title=title,
-            content=content,
-            url=resolution_url,
-            publication_date=publication_date,
-            collection_date=datetime.now().isoformat()
-        )
+        return build_resolution(title_element.text, "\n".join(p.text for p in content_elements), resolution_url)
     except Exception as e:
         logging.error(f"Error extracting data from {resolution_url}: {e}")
         return None
 
-def collect_central_bank_resolutions(save_dir: str) -> None:
-    logging.info("Starting resolution collection...")
-    with setup_chrome_driver() as driver:
-        try:
-            base_url = "https://www.bcb.gov.br/estabilidadefinanceira/buscanormas"
-            params = {
-                "dataInicioBusca": "01/01/2020",
-                "dataFimBusca": "31/12/2024",
-                "tipoDocumento": "Resolução BCB"
-            }
-            start_row = 0
-            all_links = []
-
-            while True:
-                params["startRow"] = start_row
-                url = f"{base_url}?{urlencode(params)}"
+def discover_resolution_links(driver: webdriver.Chrome, rate_limiter: HostRateLimiter) -> Iterator[List[str]]:
+    """
+    Yield the resolution links found on each search results page.
+
+    The generator only ends normally once a page without results is reached.
+    A page that keeps timing out raises TimeoutException, so an interrupted
+    pagination is never mistaken for a complete one.
+    """
+    params = {
+        "dataInicioBusca": "01/01/2020",
+        "dataFimBusca": "31/12/2024",
+        "tipoDocumento": "Resolução BCB"
+    }
+    start_row = 0
+
+    while True:
+        params["startRow"] = start_row
+        url = f"{SEARCH_URL}?{urlencode(params)}"
+        for attempt in range(1, SEARCH_PAGE_ATTEMPTS + 1):
+            rate_limiter.wait(url)
+            with instrumentation.span("search_page"):
                 driver.get(url)
                 wait = WebDriverWait(driver, 20)
-                wait.until(EC.presence_of_all_elements_located((By.CLASS_NAME, "resultado-item")))
-
-                resolution_links = [element.get_attribute("href") for element in driver.find_elements(By.XPATH, "//a[contains(@href, 'exibenormativo')]")]
-                if not resolution_links:
+                try:
+                    wait.until(EC.presence_of_all_elements_located((By.CLASS_NAME, "resultado-item")))
                     break
+                except TimeoutException:
+                    if attempt == SEARCH_PAGE_ATTEMPTS:
+                        raise TimeoutException(f"Search page starting at row {start_row} did not load")
+                    logging.warning(f"Search page starting at row {start_row} timed out, retrying")
+
+        resolution_links = [element.get_attribute("href") for element in driver.find_elements(By.XPATH, "//a[contains(@href, 'exibenormativo')]")]
+        if not resolution_links:
+            break
 
-                all_links.extend(resolution_links)
-                logging.info(f"Collected {len(resolution_links)} links from page starting at row {start_row}")
+        logging.info(f"Collected {len(resolution_links)} links from page starting at row {start_row}")
+        yield resolution_links
 
-                start_row += 15
+        start_row += SEARCH_PAGE_SIZE
 
-            all_data = []
-            for resolution_url in all_links:
-                logging.info(f"Extracting data from {resolution_url}...")
-                data = extract_resolution_data(driver, resolution_url)
-                if data:
-                    all_data.append(data)
+def recover_written_resolutions(state: CrawlStateStore, records_path: Path, urls: List[str]) -> List[str]:
+    """
+    Mark as fetched the unfinished URLs whose record an interrupted run already wrote.
 
-            save_data(all_data, save_dir)
+    A run stopped between writing a record and marking it fetched would
+    otherwise extract it again and write a duplicate line. Returns the URLs
+    that still need to be extracted.
+    """
+    pending = set(urls)
+    if pending and Path(records_path).exists():
+        for record in iter_resolutions(records_path, fields=("url", "content")):
+            if record["url"] in pending:
+                state.mark_fetched(record["url"], record["content"] or "")
+                pending.discard(record["url"])
+    recovered = len(urls) - len(pending)
+    if recovered:
+        logging.info(f"{recovered} unfinished resolutions were already written, marked as fetched")
+    return [url for url in urls if url in pending]
 
+def find_near_duplicate(near_duplicates: NearDuplicateIndex, resolution_url: str, content: str) -> Optional[str]:
+    """
+    Index a resolution and return the indexed resolution it restates, if any.
+
+    A failed lookup is logged and counted and returns None, so it never
+    costs the record itself.
+    """
+    try:
+        with instrumentation.span("near_duplicate_lookup"):
+            matches = near_duplicates.add_and_query(resolution_url, content)
+    except Exception as e:
+        instrumentation.count("near_duplicate_errors")
+        logging.error(f"Near-duplicate lookup failed for {resolution_url}: {e}")
+        return None
+    if not matches:
+        return None
+    instrumentation.count("near_duplicates")
+    original, similarity = matches[0]
+    logging.warning(f"{resolution_url} is a near-duplicate of {original} (similarity {similarity:.2f})")
+    return original
+
+def collect_central_bank_resolutions(save_dir: str, max_workers: int = 4, requests_per_second: float = 2.0,
+                                     incremental: bool = True, fetch_backend: str = "http",
+                                     detect_near_duplicates: bool = True) -> None:
+    """
+    Crawl the search pages and extract every resolution not collected yet.
+
+    Extraction runs on a pool of ``max_workers`` Chrome drivers and starts while
+    pagination is still in progress. ``requests_per_second`` caps the request
+    rate per host across the whole pool.
+
+    Progress is kept in a SQLite state store inside ``save_dir``: resolutions
+    already fetched are skipped, unfinished ones from an interrupted run are
+    retried, and once a full crawl has reached the last search page,
+    pagination stops at the first page containing only known links.
+
+    Each resolution is appended to ``resolutions_data.jsonl`` as soon as it
+    is extracted.
+
+    With the ``"http"`` backend, pages are fetched over a pooled HTTP session
+    and Chrome is only started for pages that need JavaScript to render.
+
+    With ``detect_near_duplicates``, every new resolution is looked up in a
+    MinHash/LSH index kept in ``save_dir`` before being added to it, and
+    restatements of an earlier resolution are recorded in
+    ``near_duplicate_of``.
+    """
+    if fetch_backend not in FETCH_BACKENDS:
+        raise ValueError(f"Unknown fetch backend '{fetch_backend}', expected one of {FETCH_BACKENDS}")
+
+    logging.info("Starting resolution collection...")
+    state = CrawlStateStore(Path(save_dir) / STATE_DB_NAME)
+    writer = ResolutionRecordWriter(Path(save_dir) / RESOLUTIONS_FILE_NAME)
+    rate_limiter = HostRateLimiter(requests_per_second)
+    driver_pool = ChromeDriverPool(max_workers)
+    http_fetcher = None
+    if fetch_backend == "http":
+        http_fetcher = HttpResolutionFetcher(pool_size=max_workers, rate_limiter=rate_limiter)
+    near_duplicates = None
+    if detect_near_duplicates:
+        try:
+            # Loaded once here rather than lazily by the first worker threads.
+            normalizer.stop_words
+            near_duplicates = NearDuplicateIndex(Path(save_dir) / NEAR_DUPLICATES_DB_NAME)
         except Exception as e:
-            logging.error(f"An error occurred during resolution collection: {e}")
+            logging.error(f"Near-duplicate detection disabled: {e}")
+    stop_on_known_page = incremental and state.get_meta(FULL_CRAWL_COMPLETED) == "1"
+
+    def extract(resolution_url: str) -> None:
+        logging.info(f"Extracting data from {resolution_url}...")
+        data = None
+        if http_fetcher:
+            with instrumentation.span("fetch_http"):
+                page = http_fetcher.fetch(resolution_url)
+            if page:
+                data = build_resolution(page.title, page.content, resolution_url)
+        if data is None:
+            with driver_pool.driver() as driver:
+                rate_limiter.wait(resolution_url)
+                with instrumentation.span("fetch_selenium"):
+                    data = extract_resolution_data(driver, resolution_url)
+        if data:
+            instrumentation.count("resolutions_fetched")
+            instrumentation.count("content_bytes", len(data.content.encode("utf-8")))
+            if near_duplicates:
+                data.near_duplicate_of = find_near_duplicate(near_duplicates, resolution_url, data.content)
+            writer.write(asdict(data))
+            state.mark_fetched(resolution_url, data.content)
+        else:
+            instrumentation.count("fetch_failures")
+            state.mark_failed(resolution_url, "extraction failed")
+
+    try:
+        with setup_chrome_driver() as search_driver, ThreadPoolExecutor(max_workers=max_workers) as executor:
+            unfinished = recover_written_resolutions(state, writer.path, state.unfinished_urls())
+            if unfinished:
+                logging.info(f"Resuming {len(unfinished)} unfinished resolutions from a previous run")
+            futures = [executor.submit(extract, url) for url in unfinished]
 
-def save_data(data, save_dir):
-    """Save extracted data to a file."""
-    os.makedirs(save_dir, exist_ok=True)
-    file_path = os.path.join(save_dir, "resolutions_data.json")
+            try:
+                for resolution_links in discover_resolution_links(search_driver, rate_limiter):
+                    known = state.known_urls(resolution_links)
+                    new_links = [url for url in dict.fromkeys(resolution_links) if url not in known]
+                    if not new_links and stop_on_known_page:
+                        logging.info("Reached a page with only known resolutions, stopping pagination")
+                        break
+                    state.mark_discovered(new_links)
+                    futures.extend(executor.submit(extract, url) for url in new_links)
+                else:
+                    state.set_meta(FULL_CRAWL_COMPLETED, "1")
+            except Exception as e:
+                logging.error(f"An error occurred during resolution collection: {e}")
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump([d.__dict__ for d in data], f, ensure_ascii=False, indent=4)
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error extracting a resolution: {e}")
 
-    logging.info(f"Data saved to {file_path}") 
\ No newline at end of file
+        logging.info(f"Data saved to {writer.path}")
+    finally:
+        writer.close()
+        driver_pool.close()
+        if http_fetcher:
+            http_fetcher.close()
+        if near_duplicates:
+            near_duplicates.close()
+        state.close()
@@ -0,0 +1,64 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+RESOLUTIONS_FILE_NAME = "resolutions_data.jsonl"
+
+class ResolutionRecordWriter:
+    """Append-only JSON Lines writer; every record is flushed as soon as it is written."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def write(self, record: Dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "ResolutionRecordWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def iter_resolutions(path: Path, fields: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+    """
+    Lazily yield resolution records from a JSON Lines file.
+
+    Args:
+        path: The JSON Lines file written by the collector. Legacy ``.json``
+            array files are still accepted, but are loaded in full.
+        fields: Optional subset of keys to keep from each record
+
+    Returns:
+        Iterator over the records, one dict per resolution
+    """
+    path = Path(path)
+    fields = tuple(fields) if fields is not None else None
+
+    if path.suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            records = iter(json.load(f))
+    else:
+        records = _iter_json_lines(path)
+
+    for record in records:
+        if fields is not None:
+            record = {key: record.get(key) for key in fields}
+        yield record
+
+def _iter_json_lines(path: Path) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
@@ -1,82 +1,244 @@
+import gc
 import logging
+import time
 from sklearn.model_selection import StratifiedKFold
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.svm import SVC
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
-from imblearn.over_sampling import SMOTE
-from sklearn.linear_model import Lasso
-from sklearn.pipeline import Pipeline
+from sklearn.svm import SVC, LinearSVC
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, recall_score
+from imblearn.over_sampling import SMOTE, RandomOverSampler
+from sklearn.linear_model import Lasso, LogisticRegression, SGDClassifier
+from imblearn.pipeline import Pipeline as ImbPipeline
+from sklearn.utils.class_weight import compute_sample_weight
 from sklearn.feature_selection import SelectFromModel
+from sklearn.base import clone
+from joblib import Parallel, delayed
+from scipy import sparse
 import numpy as np
-import xgboost as xgb
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
+from pipeline import instrumentation
 
 logger = logging.getLogger(__name__)
 
-def train_and_evaluate_model(X, y, word2vec_model, bert_model):
-    try:
-        smote = SMOTE()
-        X_resampled, y_resampled = smote.fit_resample(X, y)
-        logger.info("Data resampled using SMOTE.")
+RESAMPLING_STRATEGIES = ('smote', 'oversample', 'class_weight', 'none')
+
+def set_model_threads(models, model_n_jobs=1):
+    """
+    Let the models that support it use several threads internally.
+
+    ``model_n_jobs`` is a thread count for every model or a ``{model name:
+    threads}`` mapping, where unlisted models keep one thread. Each of the
+    ``n_jobs`` cross-validation processes fits one model at a time, so up to
+    ``n_jobs`` times the model threads run at once: lower ``n_jobs`` when
+    raising them, to stay within the cores.
+    """
+    for name, model in models.items():
+        threads = model_n_jobs.get(name, 1) if isinstance(model_n_jobs, dict) else model_n_jobs
+        if threads == 1:
+            continue
+        if 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=threads)
+        else:
+            logger.warning(f"{name} does not use threads internally; its model_n_jobs setting is ignored.")
+    return models
+
+def build_models(model_n_jobs=1):
+    """Candidate classifiers, with the internal threads of ``model_n_jobs`` (see set_model_threads)."""
+    import xgboost as xgb
+
+    return set_model_threads({
+        'RandomForest': RandomForestClassifier(),
+        'SVM': SVC(),
+        'XGBoost': xgb.XGBClassifier(n_jobs=1)
+    }, model_n_jobs)
+
+def build_sparse_models(model_n_jobs=1):
+    """Linear candidates that train directly on high-dimensional sparse term matrices."""
+    return set_model_threads({
+        'SGD': SGDClassifier(loss='hinge', alpha=1e-5),
+        'LogisticRegression': LogisticRegression(solver='saga', max_iter=1000),
+        'LinearSVC': LinearSVC()
+    }, model_n_jobs)
+
+def build_sampler(resampling):
+    if resampling == 'smote':
+        return SMOTE()
+    if resampling == 'oversample':
+        return RandomOverSampler()
+    if resampling in ('class_weight', 'none'):
+        return None
+    raise ValueError(f"Unknown resampling strategy '{resampling}', expected one of {RESAMPLING_STRATEGIES}")
 
+def fit_params_for(resampling, y):
+    """Class weighting is applied through per-sample weights, which every candidate model accepts."""
+    if resampling == 'class_weight':
+        return {'classification__sample_weight': compute_sample_weight('balanced', y)}
+    return {}
+
+def evaluate_fold(pipeline, X, y, train_index, test_index, resampling):
+    """
+    Fit and predict one fold; returns the predictions, the fit time and the fold's RSS increase in MB.
+
+    The increase is the peak RSS sampled during the fit over the RSS before
+    it, so it includes the native allocations of xgboost and libsvm.
+    """
+    gc.collect()
+    with instrumentation.RssSampler() as memory:
+        start = time.perf_counter()
+        pipeline.fit(X[train_index], y[train_index], **fit_params_for(resampling, y[train_index]))
+        y_pred = pipeline.predict(X[test_index])
+        elapsed = time.perf_counter() - start
+    return y_pred, elapsed, memory.increase_mb
+
+def plot_confusion_matrix(model_name, y_true, y_pred):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    cm = confusion_matrix(y_true, y_pred)
+    plt.figure(figsize=(10, 7))
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
+    plt.title(f'Confusion Matrix for {model_name}')
+    plt.xlabel('Predicted')
+    plt.ylabel('Actual')
+    Path('reports').mkdir(parents=True, exist_ok=True)
+    plt.savefig(f'reports/confusion_matrix_{model_name}.png')
+    plt.close()
+
+def cross_validate_models(X, y, resampling=None, n_jobs=-1, model_n_jobs=1):
+    """
+    Cross-validate every candidate model with resampling applied inside each fold.
+
+    The sampler is the first step of an imblearn pipeline, so it only sees
+    the training part of each fold and test folds contain original rows
+    only. Returns a pipeline factory, the candidate models and, per model,
+    the out-of-fold predictions (in the order of ``y``), fold accuracies, fit
+    times and RSS increase of each fold.
+    """
+    if sparse.issparse(X):
+        X = sparse.csr_matrix(X)
+        resampling = resampling or 'oversample'
+        selector = SelectFromModel(LinearSVC(penalty='l1', dual=False, C=0.5))
+        models = build_sparse_models(model_n_jobs)
+    else:
+        resampling = resampling or 'smote'
         lasso = Lasso(alpha=0.01)
         selector = SelectFromModel(lasso)
+        models = build_models(model_n_jobs)
+    sampler = build_sampler(resampling)
+
+    def build_pipeline(model):
+        steps = [
+            ('feature_selection', clone(selector)),
+            ('classification', clone(model))
+        ]
+        if sampler is not None:
+            steps.insert(0, ('resampling', clone(sampler)))
+        return ImbPipeline(steps)
+
+    skf = StratifiedKFold(n_splits=5)
+    folds = list(skf.split(X, y))
+    tasks = [
+        (model_name, fold, build_pipeline(model))
+        for model_name, model in models.items()
+        for fold in range(len(folds))
+    ]
 
-        skf = StratifiedKFold(n_splits=5)
-
-        models = {
-            'RandomForest': RandomForestClassifier(),
-            'SVM': SVC(),
-            'XGBoost': xgb.XGBClassifier()
-        }
-
-        best_model = None
-        best_accuracy = 0
-        best_y_pred = None
-
-        for model_name, model in models.items():
-            pipeline = Pipeline([
-                ('feature_selection', selector),
-                ('classification', model)
-            ])
-            
-            all_y_pred = np.array([])  # Armazena todas as previsões
-            all_y_test = np.array([])  # Armazena todos os rótulos verdadeiros
-
-            for train_index, test_index in skf.split(X_resampled, y_resampled):
-                X_train, X_test = X_resampled[train_index], X_resampled[test_index]
-                y_train, y_test = y_resampled[train_index], y_resampled[test_index]
-                
-                pipeline.fit(X_train, y_train)
-                y_pred = pipeline.predict(X_test)
-                accuracy = accuracy_score(y_test, y_pred)
-                
-                all_y_pred = np.concatenate([all_y_pred, y_pred])
-                all_y_test = np.concatenate([all_y_test, y_test])
-
-                if accuracy > best_accuracy:
-                    best_accuracy = accuracy
-                    best_model = model
-                    best_y_pred = y_pred
-
-                logger.info(f"Results for {model_name}:")
-                logger.info(classification_report(y_test, y_pred))
-
-                cm = confusion_matrix(y_test, y_pred)
-                plt.figure(figsize=(10, 7))
-                sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
-                plt.title(f'Confusion Matrix for {model_name}')
-                plt.xlabel('Predicted')
-                plt.ylabel('Actual')
-                Path('reports').mkdir(parents=True, exist_ok=True)
-                plt.savefig(f'reports/confusion_matrix_{model_name}.png')
-                plt.close()
-
-        # Retornar todas as previsões concatenadas
-        return all_y_pred
+    start = time.perf_counter()
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_fold)(pipeline, X, y, *folds[fold], resampling)
+        for _, fold, pipeline in tasks
+    )
+    logger.info(f"Cross-validation of {len(models)} models x {len(folds)} folds with '{resampling}' resampling "
+                f"took {time.perf_counter() - start:.2f}s (n_jobs={n_jobs}).")
+
+    evaluations = {
+        model_name: {'y_pred': np.empty(len(y)), 'accuracies': [], 'fit_times': [], 'rss_increase_mb': []}
+        for model_name in models
+    }
+    for (model_name, fold, _), (y_pred, fit_time, rss_increase) in zip(tasks, results):
+        test_index = folds[fold][1]
+        y_test = y[test_index]
+        evaluation = evaluations[model_name]
+        evaluation['y_pred'][test_index] = y_pred
+        evaluation['accuracies'].append(accuracy_score(y_test, y_pred))
+        evaluation['fit_times'].append(fit_time)
+        evaluation['rss_increase_mb'].append(rss_increase)
+        instrumentation.record(f'cv_fold/{model_name}', fit_time)
+
+        logger.info(f"Results for {model_name} (fold {fold + 1}, fit {fit_time:.2f}s, "
+                    f"RSS +{rss_increase} MB):")
+        logger.info(classification_report(y_test, y_pred))
+
+    return build_pipeline, models, resampling, evaluations
+
+def train_and_evaluate_model(X, y, n_jobs=-1, model_n_jobs=1, resampling=None, save_best_to=None,
+                             artifact_metadata=None):
+    """
+    Cross-validate every candidate model and return the out-of-fold predictions of the last one.
+
+    All (model, fold) fits run in parallel on ``n_jobs`` processes; each model
+    may additionally use threads, set per model by ``model_n_jobs`` (see
+    set_model_threads). Confusion matrices are
+    plotted once per model from the aggregated folds, after evaluation.
+
+    ``resampling`` is one of RESAMPLING_STRATEGIES and runs inside each fold;
+    ``class_weight`` reweights samples instead of copying rows. It defaults
+    to SMOTE for dense ``X`` and to random oversampling for sparse ``X``
+    (e.g. TF-IDF or hashed text features), which stays sparse throughout: the
+    Lasso selector is replaced by an L1-penalized LinearSVC and the
+    candidates by linear models suited to sparse input.
+
+    With ``save_best_to``, the model with the best mean fold accuracy is refit
+    on all the data and saved as a model artifact, together with
+    ``artifact_metadata`` (label encoder, feature config and vectorizers).
+    """
+    try:
+        build_pipeline, models, resampling, evaluations = cross_validate_models(
+            X, y, resampling, n_jobs, model_n_jobs
+        )
+
+        for model_name, evaluation in evaluations.items():
+            plot_confusion_matrix(model_name, y, evaluation['y_pred'])
+
+        if save_best_to is not None:
+            from data_mining.model_artifacts import save_model_artifact
+
+            mean_accuracies = {name: np.mean(evaluation['accuracies']) for name, evaluation in evaluations.items()}
+            best_name = max(mean_accuracies, key=mean_accuracies.get)
+            best_pipeline = build_pipeline(models[best_name]).fit(X, y, **fit_params_for(resampling, y))
+            save_model_artifact(best_pipeline, best_name, mean_accuracies[best_name], path=save_best_to,
+                                **(artifact_metadata or {}))
+
+        # Previsões fora da amostra do último modelo, na ordem de y
+        return list(evaluations.values())[-1]['y_pred']
 
     except Exception as e:
         logger.error(f"Error during model training and evaluation: {e}")
         return None
+
+def compare_resampling_strategies(X, y, strategies=RESAMPLING_STRATEGIES, n_jobs=-1, model_n_jobs=1,
+                                  report_path='reports/resampling_strategies_report.txt'):
+    """Cross-validate every model under each resampling strategy and report recall, fit time and fold memory."""
+    import pandas as pd
+
+    rows = []
+    for strategy in strategies:
+        _, _, _, evaluations = cross_validate_models(X, y, strategy, n_jobs, model_n_jobs)
+        for model_name, evaluation in evaluations.items():
+            rows.append({
+                'strategy': strategy,
+                'model': model_name,
+                'accuracy': np.mean(evaluation['accuracies']),
+                'macro_recall': recall_score(y, evaluation['y_pred'], average='macro'),
+                'mean_fit_seconds': np.mean(evaluation['fit_times']),
+                'peak_fold_rss_increase_mb': max(
+                    (mb for mb in evaluation['rss_increase_mb'] if mb is not None), default=None
+                )
+            })
+
+    report = pd.DataFrame(rows)
+    Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w') as f:
+        f.write("Resampling Strategies Report\n")
+        f.write(report.to_string(index=False))
+    logger.info(f"Resampling strategy comparison written to {report_path}")
+    return report
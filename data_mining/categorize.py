@@ -0,0 +1,94 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import json
+import logging
+import time
+from data_collection.resolution_records import RESOLUTIONS_FILE_NAME, iter_resolutions
+from data_mining.features import FeatureBuilder
+from data_mining.model_artifacts import MODEL_ARTIFACT_PATH, load_model_artifact
+from data_mining.nlp_cache import NlpResultCache
+from data_mining.preprocessing import analysis_fingerprint, analyze_corpus
+from data_mining.text_features import iter_batches
+from pipeline import instrumentation
+
+DEFAULT_OUTPUT_PATH = Path('reports/categorized_resolutions.jsonl')
+OUTPUT_FIELDS = ('url', 'title', 'publication_date')
+
+logger = logging.getLogger(__name__)
+
+def categorize_records(records, artifact, batch_size=256, n_process=1, nlp_cache=None):
+    """
+    Score collector records with a saved model artifact.
+
+    Records stream through a single analyze_corpus pass and are scored in
+    batches of ``batch_size``; yields ``(record, category)`` pairs. Records
+    whose text yields no complexity metrics are skipped.
+    """
+    builder = FeatureBuilder.from_config(artifact['feature_config'], artifact['vectorizers'])
+    pipeline = artifact['pipeline']
+    label_encoder = artifact['label_encoder']
+
+    analyzed = analyze_corpus(
+        ((record['content'] or '', record) for record in records),
+        n_process=n_process, as_tuples=True, cache=nlp_cache
+    )
+    for batch in iter_batches(analyzed, batch_size):
+        batch = [(text, metrics, record) for (text, metrics), record in batch if metrics]
+        if not batch:
+            continue
+        resolution_ids = [record['url'] for _, _, record in batch]
+        texts = {record['url']: text for text, _, record in batch if builder.needs_text(record['url'])}
+
+        X = builder.build(resolution_ids, [metrics for _, metrics, _ in batch], texts)
+        categories = label_encoder.inverse_transform(pipeline.predict(X))
+        yield from zip((record for _, _, record in batch), categories)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Categorize collected resolutions with a saved model.")
+    parser.add_argument('--input', type=Path, default=Path('data/raw') / RESOLUTIONS_FILE_NAME,
+                        help="Collector output (JSON Lines) to categorize.")
+    parser.add_argument('--model', type=Path, default=MODEL_ARTIFACT_PATH)
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT_PATH)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--n-process', type=int, default=1, help="spaCy worker processes (-1 for all cores).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    run = instrumentation.start_run('categorize')
+    with instrumentation.span('load_model'):
+        artifact = load_model_artifact(args.model)
+    records = iter_resolutions(args.input, fields=OUTPUT_FIELDS + ('content',))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    nlp_cache = NlpResultCache(analysis_fingerprint())
+    start = time.perf_counter()
+    documents = 0
+    try:
+        with instrumentation.span('categorize'), open(args.output, 'w', encoding='utf-8') as f:
+            for record, category in categorize_records(records, artifact, args.batch_size, args.n_process, nlp_cache):
+                output = {field: record[field] for field in OUTPUT_FIELDS}
+                output['category'] = str(category)
+                f.write(json.dumps(output, ensure_ascii=False) + '\n')
+                documents += 1
+                instrumentation.count('documents')
+    finally:
+        nlp_cache.close()
+        instrumentation.count('nlp_cache_hits', nlp_cache.hits)
+        instrumentation.count('nlp_cache_misses', nlp_cache.misses)
+        run.write_summary()
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Categorized {documents} resolutions in {elapsed:.2f}s "
+        f"({documents / elapsed if elapsed else 0:.1f} documents/s) into {args.output}"
+    )
+
+if __name__ == "__main__":
+    main()
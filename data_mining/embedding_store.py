@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+from pathlib import Path
+import numpy as np
+from pipeline.atomic import atomic_write
+
+EMBEDDING_STORE_DIR = Path('data/embeddings')
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingStore:
+    """
+    Append-only, memory-mapped matrix of document embeddings keyed by resolution ID.
+
+    Rows live in a raw float32 file and a JSON index maps each resolution ID
+    to its row. The index also records the backend ``fingerprint``; when it no
+    longer matches the backend, the stored vectors are treated as stale and
+    replaced on the next ``add``.
+    """
+
+    def __init__(self, name, fingerprint, directory=EMBEDDING_STORE_DIR):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.data_path = directory / f'{name}.f32'
+        self.index_path = directory / f'{name}.index.json'
+        self.fingerprint = fingerprint
+        self.dim = None
+        self.ids = []
+
+        if self.index_path.exists():
+            index = json.loads(self.index_path.read_text(encoding='utf-8'))
+            if index['fingerprint'] == fingerprint:
+                self.dim = index['dim']
+                self.ids = index['ids']
+            else:
+                logger.info(f"Embedding store '{name}' is stale and will be rebuilt.")
+        self.rows = {resolution_id: row for row, resolution_id in enumerate(self.ids)}
+
+    def __contains__(self, resolution_id):
+        return resolution_id in self.rows
+
+    def __len__(self):
+        return len(self.ids)
+
+    def missing(self, resolution_ids):
+        return [resolution_id for resolution_id in dict.fromkeys(resolution_ids) if resolution_id not in self.rows]
+
+    def add(self, resolution_ids, vectors, fingerprint):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if fingerprint != self.fingerprint or self.dim != vectors.shape[1]:
+            self.fingerprint = fingerprint
+            self.dim = vectors.shape[1]
+            self.ids = []
+            self.rows = {}
+
+        keep = [i for i, resolution_id in enumerate(resolution_ids) if resolution_id not in self.rows]
+        if not keep:
+            return
+
+        # Rows beyond the index belong to an interrupted write; cut them off before appending.
+        with open(self.data_path, 'r+b' if self.data_path.exists() else 'w+b') as f:
+            f.truncate(len(self.ids) * self.dim * vectors.itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(vectors[keep]).tobytes())
+
+        for i in keep:
+            self.rows[resolution_ids[i]] = len(self.ids)
+            self.ids.append(resolution_ids[i])
+        self._write_index()
+
+    def matrix(self):
+        if not self.ids:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.memmap(self.data_path, dtype=np.float32, mode='r', shape=(len(self.ids), self.dim))
+
+    def get(self, resolution_ids):
+        return self.matrix()[[self.rows[resolution_id] for resolution_id in resolution_ids]]
+
+    def _write_index(self):
+        with atomic_write(self.index_path) as tmp_path:
+            tmp_path.write_text(
+                json.dumps({'fingerprint': self.fingerprint, 'dim': self.dim, 'ids': self.ids}), encoding='utf-8'
+            )
@@ -0,0 +1,145 @@
+import hashlib
+import inspect
+import logging
+import time
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+METRICS_FEATURE_SET = 'metrics'
+WORD2VEC_MODEL_PATH = Path('data/embeddings/word2vec.model')
+EMBEDDING_BACKENDS = {}
+
+def register_embedding_backend(name):
+    """Register an embedding backend class under a feature set name."""
+    def decorator(cls):
+        EMBEDDING_BACKENDS[name] = cls
+        return cls
+    return decorator
+
+def available_feature_sets():
+    return (METRICS_FEATURE_SET,) + tuple(EMBEDDING_BACKENDS)
+
+def load_embedding_backend(name, **options):
+    """
+    Instantiate the backend of an embedding feature set.
+
+    Instantiating a backend is cheap: libraries and models are only loaded on
+    the first ``embed`` call, so a run whose embeddings are all in the
+    EmbeddingStore never loads them at all.
+    """
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding feature set '{name}', expected one of {tuple(EMBEDDING_BACKENDS)}")
+
+    return EMBEDDING_BACKENDS[name](**options)
+
+@register_embedding_backend('word2vec')
+class Word2VecBackend:
+    """
+    Document vectors as the average of Word2Vec vectors.
+
+    The model is trained on the first corpus it embeds and saved to
+    ``model_path``; later runs reuse it so stored vectors stay comparable.
+    """
+
+    def __init__(self, vector_size=100, window=5, min_count=1, workers=4, model_path=WORD2VEC_MODEL_PATH):
+        self.dim = vector_size
+        self.options = dict(vector_size=vector_size, window=window, min_count=min_count, workers=workers)
+        self.model_path = Path(model_path)
+        self.model = None
+
+    @property
+    def fingerprint(self):
+        if not self.model_path.exists():
+            return 'word2vec|untrained'
+        stat = self.model_path.stat()
+        return f"word2vec|{self.dim}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def embed(self, texts):
+        sentences = [text.split() for text in texts]
+        self._load_or_train(sentences)
+
+        vectors = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for i, words in enumerate(sentences):
+            known = [word for word in words if word in self.model.wv]
+            if known:
+                vectors[i] = self.model.wv[known].mean(axis=0)
+        return vectors
+
+    def _load_or_train(self, sentences):
+        if self.model is not None:
+            return
+        from gensim.models import Word2Vec
+
+        if self.model_path.exists():
+            self.model = Word2Vec.load(str(self.model_path))
+            return
+
+        logger.info(f"Training Word2Vec on {len(sentences)} documents...")
+        self.model = Word2Vec(sentences=sentences, **self.options)
+        self.model_path.parent.mkdir(parents=True, exist_ok=True)
+        self.model.save(str(self.model_path))
+
+@register_embedding_backend('bert')
+class BertBackend:
+    """
+    Mean-pooled BERT token embeddings, computed on CPU.
+
+    Documents are sorted by length and grouped so that each padded batch holds
+    at most ``tokens_per_batch`` tokens, which keeps padding waste and peak
+    memory bounded whatever the length mix of the corpus.
+    """
+
+    def __init__(self, model_name='bert-base-uncased', max_length=512, tokens_per_batch=8192, num_threads=None):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.tokens_per_batch = tokens_per_batch
+        self.num_threads = num_threads
+        self.tokenizer = None
+        self.model = None
+
+    @property
+    def fingerprint(self):
+        # The tokenization, pooling and model loading code is part of it, so editing them invalidates stored vectors.
+        code = inspect.getsource(BertBackend.embed) + inspect.getsource(BertBackend._load)
+        return f"bert|{self.model_name}|{self.max_length}|{hashlib.sha256(code.encode('utf-8')).hexdigest()[:16]}"
+
+    def embed(self, texts):
+        self._load()
+        encoded = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)['input_ids']
+        vectors = np.zeros((len(encoded), self.model.config.hidden_size), dtype=np.float32)
+
+        for batch in self._token_batches(encoded):
+            padded = self.tokenizer.pad({'input_ids': [encoded[i] for i in batch]}, return_tensors='tf')
+            hidden = self.model(padded).last_hidden_state.numpy()
+            mask = padded['attention_mask'].numpy()[..., np.newaxis]
+            vectors[batch] = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1)
+        return vectors
+
+    def _token_batches(self, encoded):
+        batch = []
+        batch_length = 0
+        for i in sorted(range(len(encoded)), key=lambda i: len(encoded[i])):
+            length = len(encoded[i])
+            if batch and max(batch_length, length) * (len(batch) + 1) > self.tokens_per_batch:
+                yield batch
+                batch, batch_length = [], 0
+            batch.append(i)
+            batch_length = max(batch_length, length)
+        if batch:
+            yield batch
+
+    def _load(self):
+        if self.model is not None:
+            return
+        start = time.perf_counter()
+        import tensorflow as tf
+        from transformers import BertTokenizerFast, TFBertModel
+
+        tf.config.set_visible_devices([], 'GPU')
+        if self.num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(self.num_threads)
+        self.tokenizer = BertTokenizerFast.from_pretrained(self.model_name)
+        self.model = TFBertModel.from_pretrained(self.model_name)
+        logger.info(f"Loaded BERT model {self.model_name} in {time.perf_counter() - start:.2f}s.")
@@ -0,0 +1,87 @@
+import logging
+import numpy as np
+from data_analysis.complexity_analysis import METRIC_COLUMNS
+from data_mining.embeddings import EMBEDDING_BACKENDS, METRICS_FEATURE_SET, load_embedding_backend
+from data_mining.embedding_store import EmbeddingStore
+from data_mining.text_features import SPARSE_FEATURE_SETS, sparse_text_features
+
+# Bump when the meaning of a feature set changes, so old model artifacts are rejected.
+FEATURE_CONFIG_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+class FeatureBuilder:
+    """
+    Turn analyzed resolutions into the feature matrix of a set of feature sets.
+
+    The same builder configuration is used at training time, where sparse
+    vectorizers are fitted, and at inference time, where the fitted
+    vectorizers saved with the model are reused.
+    """
+
+    def __init__(self, feature_sets, backend_options=None, vectorizers=None):
+        self.feature_sets = list(feature_sets)
+        self.backend_options = backend_options or {}
+        self.vectorizers = dict(vectorizers or {})
+        self.backends = {
+            name: load_embedding_backend(name, **self.backend_options.get(name, {}))
+            for name in self.feature_sets if name in EMBEDDING_BACKENDS
+        }
+        self.stores = {name: EmbeddingStore(name, backend.fingerprint) for name, backend in self.backends.items()}
+        self.sparse_sets = [name for name in self.feature_sets if name in SPARSE_FEATURE_SETS]
+
+    @classmethod
+    def from_config(cls, config, vectorizers=None):
+        if config.get('version') != FEATURE_CONFIG_VERSION:
+            raise ValueError(
+                f"Feature config version {config.get('version')} does not match {FEATURE_CONFIG_VERSION}; "
+                "retrain the model."
+            )
+        return cls(config['feature_sets'], config['backend_options'], vectorizers)
+
+    @property
+    def config(self):
+        return {
+            'version': FEATURE_CONFIG_VERSION,
+            'feature_sets': self.feature_sets,
+            'backend_options': self.backend_options,
+            'metric_columns': METRIC_COLUMNS
+        }
+
+    def needs_text(self, resolution_id):
+        """Whether building features for this resolution requires its preprocessed text."""
+        return bool(self.sparse_sets) or any(resolution_id not in store for store in self.stores.values())
+
+    def build(self, resolution_ids, metrics_rows, texts):
+        """
+        Feature matrix for the given resolutions, in order.
+
+        ``texts`` maps resolution IDs to preprocessed text; it only needs the
+        resolutions for which ``needs_text`` is true. The result is sparse as
+        soon as a sparse feature set is requested.
+        """
+        blocks = []
+        if METRICS_FEATURE_SET in self.feature_sets:
+            blocks.append(np.array([[metrics[column] for column in METRIC_COLUMNS] for metrics in metrics_rows]))
+
+        for name, backend in self.backends.items():
+            store = self.stores[name]
+            missing = store.missing(resolution_ids)
+            if missing:
+                logger.info(f"Computing '{name}' embeddings for {len(missing)} new resolutions...")
+                store.add(missing, backend.embed([texts[rid] for rid in missing]), backend.fingerprint)
+            blocks.append(store.get(resolution_ids))
+
+        for mode in self.sparse_sets:
+            documents = [texts[rid] for rid in resolution_ids]
+            if mode in self.vectorizers:
+                blocks.append(self.vectorizers[mode].transform(documents))
+            else:
+                X_text, self.vectorizers[mode] = sparse_text_features(documents, mode)
+                blocks.append(X_text)
+
+        if self.sparse_sets:
+            from scipy import sparse
+
+            return sparse.hstack(blocks, format='csr')
+        return np.hstack(blocks)
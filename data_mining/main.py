@@ -3,19 +3,27 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-import json
+import argparse
 import numpy as np
 import logging
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import accuracy_score
-from data_analysis.complexity_analysis import calculate_complexity_metrics
-from data_mining.categorization_model import train_and_evaluate_model
-from data_analysis.validation import validate_sample
-from data_mining.preprocessing import preprocess_text
-from gensim.models import Word2Vec
-from transformers import BertTokenizer, TFBertModel
-from data_analysis.statistical_analysis import analyze_complexity_vs_accuracy
-from data_analysis.longitudinal_analysis import plot_trends
+from dataclasses import dataclass, field
+from data_analysis.analytics_store import analytics_row, write_analytics_store
+from data_analysis.complexity_analysis import write_complexity_report
+from data_mining.preprocessing import analysis_fingerprint, analyze_corpus
+from data_mining.nlp_cache import NlpResultCache
+from data_mining.embeddings import METRICS_FEATURE_SET, available_feature_sets
+from data_mining.features import FeatureBuilder
+from data_mining.model_artifacts import MODEL_ARTIFACT_PATH, save_model_artifact
+from data_mining.text_features import SPARSE_FEATURE_SETS, build_text_vectorizer, train_out_of_core
+from data_collection.resolution_records import RESOLUTIONS_FILE_NAME, iter_resolutions
+from pipeline import instrumentation
+
+# Modelling and analysis modules pull in scikit-learn, xgboost, seaborn and plotly;
+# they are imported inside main() right before the stage that needs them.
+
+NLP_BATCH_SIZE = 32
+NLP_N_PROCESS = -1
+ANALYTICS_FIELDS = ('url', 'title', 'publication_date', 'collection_date', 'content', 'category')
 
 def configure_logging() -> None:
     logging.basicConfig(
@@ -28,67 +36,261 @@ def configure_logging() -> None:
     )
 
 def calculate_accuracy_scores(y_true, y_pred):
-    return accuracy_score(y_true, y_pred)
+    """Per-resolution accuracy of the out-of-fold predictions (1.0 when correct)."""
+    return (np.asarray(y_true) == np.asarray(y_pred)).astype(float)
+
+def resolution_category(index, resolution):
+    return resolution['category'] or ('categoria_1' if index % 2 == 0 else 'categoria_2')
+
+def add_model_n_jobs_argument(parser):
+    parser.add_argument('--model-n-jobs', nargs='+', type=model_threads, metavar='[MODEL=]THREADS',
+                        help="Threads each model may use internally, for all models or per model "
+                             "(e.g. RandomForest=4 XGBoost=2). They multiply with --n-jobs, so lower it "
+                             "when raising these.")
+
+def model_threads(value):
+    name, _, threads = value.rpartition('=')
+    try:
+        return (name or None, int(threads))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected THREADS or MODEL=THREADS, got '{value}'")
+
+def model_n_jobs_setting(values):
+    """The ``model_n_jobs`` of ``--model-n-jobs``: one thread count, or a mapping of model names to threads."""
+    if values is None:
+        return 1
+    if len(values) == 1 and values[0][0] is None:
+        return values[0][1]
+    if any(name is None for name, _ in values):
+        raise ValueError("--model-n-jobs takes either one thread count or MODEL=THREADS pairs")
+    return dict(values)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Categorize and analyze the collected Central Bank resolutions.")
+    parser.add_argument('--features', nargs='+', choices=available_feature_sets() + SPARSE_FEATURE_SETS,
+                        default=[METRICS_FEATURE_SET],
+                        help="Feature sets to train on; embedding backends are loaded only when listed here, "
+                             "and hashing/tfidf build sparse term matrices.")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help="Stream hashed text features through a partial_fit classifier instead of "
+                             "building the full feature matrix.")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Parallel cross-validation workers.")
+    add_model_n_jobs_argument(parser)
+    parser.add_argument('--resampling', choices=('smote', 'oversample', 'class_weight', 'none'),
+                        help="Class balancing applied inside each CV fold (default: smote, or oversample for "
+                             "sparse features).")
+    parser.add_argument('--compare-resampling', action='store_true',
+                        help="Also cross-validate every resampling strategy and report recall, fit time and "
+                             "the memory each fold uses.")
+    parser.add_argument('--tokens-per-batch', type=int, default=8192,
+                        help="Token budget of each padded BERT inference batch.")
+    parser.add_argument('--model-path', type=Path, default=MODEL_ARTIFACT_PATH,
+                        help="Where to save the best fitted pipeline for data_mining.categorize.")
+    parser.add_argument('--run-summary', type=Path,
+                        help="Where to write the JSON run summary (default: reports/run_summaries/).")
+    parser.add_argument('--profile', type=Path,
+                        help="Run under cProfile and write the stats to this path.")
+    args = parser.parse_args(argv)
+    try:
+        args.model_n_jobs = model_n_jobs_setting(args.model_n_jobs)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def run_out_of_core(data_path, logger, model_path=MODEL_ARTIFACT_PATH):
+    classes = sorted({
+        resolution_category(i, resolution)
+        for i, resolution in enumerate(iter_resolutions(data_path, fields=('category',)))
+    })
+    if len(classes) <= 1:
+        logger.error("The dataset needs to have more than one category.")
+        return
+
+    from sklearn.preprocessing import LabelEncoder
 
-def main():
+    label_encoder = LabelEncoder().fit(classes)
+    class_codes = {category: code for code, category in enumerate(label_encoder.classes_)}
+    # The saved vectorizer and feature config let data_mining.categorize score new resolutions with this model.
+    feature_builder = FeatureBuilder(['hashing'])
+    vectorizer = build_text_vectorizer('hashing')
+
+    nlp_cache = NlpResultCache(analysis_fingerprint())
+    try:
+        resolutions = (
+            (resolution['content'] or '', resolution_category(i, resolution))
+            for i, resolution in enumerate(iter_resolutions(data_path, fields=('content', 'category')))
+        )
+        analyzed = analyze_corpus(resolutions, batch_size=NLP_BATCH_SIZE, n_process=NLP_N_PROCESS, as_tuples=True,
+                                  cache=nlp_cache)
+        with instrumentation.span('out_of_core_training'):
+            model, accuracy = train_out_of_core(
+                ((text, class_codes[category]) for (text, _), category in analyzed),
+                np.arange(len(class_codes)), vectorizer=vectorizer
+            )
+        logger.info(f"Out-of-core model trained successfully (progressive validation accuracy {accuracy:.3f}).")
+        save_model_artifact(model, 'SGD (out-of-core)', accuracy, label_encoder, feature_builder.config,
+                            {'hashing': vectorizer}, path=model_path)
+    except Exception as e:
+        logger.error(f"Error during out-of-core training: {e}")
+    finally:
+        nlp_cache.close()
+
+def main(argv=None):
+    args = parse_args(argv)
     configure_logging()
+
+    run = instrumentation.start_run('data_mining')
+    try:
+        with instrumentation.profiled(args.profile):
+            run_pipeline(args)
+    finally:
+        run.write_summary(args.run_summary)
+
+@dataclass
+class AnalyzedCorpus:
+    # Analytics rows keep no text; the ones with metrics line up with resolution_ids, in order.
+    analytics_rows: list = field(default_factory=list)
+    modelled_rows: list = field(default_factory=list)
+    complexity_metrics: list = field(default_factory=list)
+    categories: list = field(default_factory=list)
+    resolution_ids: list = field(default_factory=list)
+    # Preprocessed texts are only kept for resolutions whose features need them.
+    texts: dict = field(default_factory=dict)
+
+def analyze_resolutions(data_path, feature_builder=None):
+    """Analyze every collected resolution once, through the NLP result cache."""
     logger = logging.getLogger(__name__)
-    
-    data_path = Path(__file__).resolve().parent.parent / 'data/raw/resolutions_data.json'
-    
+    corpus = AnalyzedCorpus()
+    nlp_cache = NlpResultCache(analysis_fingerprint())
     try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            resolutions = json.load(f)
-        logger.info("Resolutions data loaded successfully.")
-    except Exception as e:
-        logger.error(f"Failed to load resolutions data: {e}")
+        resolutions = (
+            (
+                resolution['content'] or '',
+                (analytics_row(resolution), resolution_category(i, resolution))
+            )
+            for i, resolution in enumerate(iter_resolutions(data_path, fields=ANALYTICS_FIELDS))
+        )
+        with instrumentation.span('analysis'):
+            analyzed = analyze_corpus(resolutions, batch_size=NLP_BATCH_SIZE, n_process=NLP_N_PROCESS, as_tuples=True,
+                                      cache=nlp_cache)
+            for i, ((text, metrics), (row, category)) in enumerate(analyzed):
+                row['category'] = category
+                corpus.analytics_rows.append(row)
+                instrumentation.count('documents')
+                instrumentation.count('content_chars', row['content_length'])
+                if not metrics:
+                    logger.warning(f"Error processing resolution {i}: no complexity metrics")
+                    continue
+                row.update(metrics)
+                corpus.modelled_rows.append(row)
+                resolution_id = row['url']
+                corpus.complexity_metrics.append(metrics)
+                corpus.categories.append(category)
+                corpus.resolution_ids.append(resolution_id)
+                if feature_builder is not None and feature_builder.needs_text(resolution_id):
+                    corpus.texts[resolution_id] = text
+        instrumentation.count('nlp_cache_hits', nlp_cache.hits)
+        instrumentation.count('nlp_cache_misses', nlp_cache.misses)
+        logger.info(
+            f"Resolutions data processed successfully ({nlp_cache.hits} cache hits, {nlp_cache.misses} misses)."
+        )
+    finally:
+        nlp_cache.close()
+    return corpus
+
+def fit_categorization_model(X, categories, feature_builder, n_jobs=-1, resampling=None,
+                             model_path=MODEL_ARTIFACT_PATH, model_n_jobs=1):
+    """Cross-validate the candidate models and save the best; returns the encoded labels and predictions."""
+    from sklearn.preprocessing import LabelEncoder
+    from data_mining.categorization_model import train_and_evaluate_model
+
+    label_encoder = LabelEncoder()
+    y_encoded = label_encoder.fit_transform(np.array(categories))
+
+    with instrumentation.span('training'):
+        y_pred = train_and_evaluate_model(
+            X, y_encoded, n_jobs=n_jobs, model_n_jobs=model_n_jobs, resampling=resampling, save_best_to=model_path,
+            artifact_metadata={
+                'label_encoder': label_encoder,
+                'feature_config': feature_builder.config,
+                'vectorizers': feature_builder.vectorizers
+            }
+        )
+    if y_pred is None:
+        raise RuntimeError("Model training and evaluation failed; see the log for details.")
+    if len(y_pred) != len(y_encoded):
+        raise ValueError("Mismatch in the number of predictions and true labels.")
+    return y_encoded, y_pred
+
+def run_pipeline(args):
+    logger = logging.getLogger(__name__)
+
+    data_path = Path(__file__).resolve().parent.parent / 'data/raw' / RESOLUTIONS_FILE_NAME
+    if args.out_of_core:
+        run_out_of_core(data_path, logger, args.model_path)
         return
 
-    word2vec_model = Word2Vec(vector_size=100, window=5, min_count=1, workers=4)
-    bert_tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-    bert_model = TFBertModel.from_pretrained('bert-base-uncased')
+    feature_builder = FeatureBuilder(args.features, {'bert': {'tokens_per_batch': args.tokens_per_batch}})
 
-    for i, resolution in enumerate(resolutions):
-        try:
-            resolution['content'] = preprocess_text(resolution['content'])
-            resolution['complexity_metrics'] = calculate_complexity_metrics(resolution['content'])
-            if 'category' not in resolution:
-                resolution['category'] = 'categoria_1' if i % 2 == 0 else 'categoria_2'
-        except Exception as e:
-            logger.warning(f"Error processing resolution {i}: {e}")
+    try:
+        corpus = analyze_resolutions(data_path, feature_builder)
+        write_complexity_report(corpus.complexity_metrics)
+    except Exception as e:
+        logger.error(f"Failed to load resolutions data: {e}")
+        return
 
-    categories = set(res['category'] for res in resolutions)
-    if len(categories) <= 1:
+    if len(set(corpus.categories)) <= 1:
         logger.error("The dataset needs to have more than one category.")
         return
 
-    X = np.array([list(res['complexity_metrics'].values()) for res in resolutions])
-    y = np.array([res['category'] for res in resolutions])
-
-    label_encoder = LabelEncoder()
-    y_encoded = label_encoder.fit_transform(y)
+    try:
+        with instrumentation.span('features'):
+            X = feature_builder.build(corpus.resolution_ids, corpus.complexity_metrics, corpus.texts)
+        corpus.texts.clear()
+    except Exception as e:
+        logger.error(f"Error computing features: {e}")
+        return
 
     try:
-        y_pred = train_and_evaluate_model(X, y_encoded, word2vec_model, bert_model)
+        y_encoded, y_pred = fit_categorization_model(X, corpus.categories, feature_builder, n_jobs=args.n_jobs,
+                                                     resampling=args.resampling, model_path=args.model_path,
+                                                     model_n_jobs=args.model_n_jobs)
         logger.info("Model trained and evaluated successfully.")
     except Exception as e:
         logger.error(f"Error during model training and evaluation: {e}")
         return
 
+    if args.compare_resampling:
+        try:
+            from data_mining.categorization_model import compare_resampling_strategies
+
+            with instrumentation.span('compare_resampling'):
+                compare_resampling_strategies(X, y_encoded, n_jobs=args.n_jobs, model_n_jobs=args.model_n_jobs)
+        except Exception as e:
+            logger.error(f"Error comparing resampling strategies: {e}")
+
     try:
-        complexity_metrics = [res['complexity_metrics'] for res in resolutions]
-        if len(y_pred) != len(y_encoded):
-            logger.error("Mismatch in the number of predictions and true labels.")
-            return
+        for row, accuracy in zip(corpus.modelled_rows, calculate_accuracy_scores(y_encoded, y_pred)):
+            row['accuracy'] = accuracy
+        with instrumentation.span('analytics_store'):
+            write_analytics_store(corpus.analytics_rows)
+    except Exception as e:
+        logger.error(f"Error writing the analytics store: {e}")
+        return
+
+    from data_analysis.statistical_analysis import analyze_complexity_vs_accuracy
+    from data_analysis.longitudinal_analysis import plot_trends
 
-        accuracy_scores = calculate_accuracy_scores(y_encoded, y_pred)
-        analyze_complexity_vs_accuracy(complexity_metrics, accuracy_scores)
+    try:
+        with instrumentation.span('statistical_analysis'):
+            analyze_complexity_vs_accuracy()
         logger.info("Statistical analysis completed successfully.")
     except Exception as e:
         logger.error(f"Error during statistical analysis: {e}")
 
     try:
-        plot_trends(data_path)
+        with instrumentation.span('longitudinal_analysis'):
+            plot_trends()
         logger.info("Longitudinal analysis completed successfully.")
     except Exception as e:
         logger.error(f"Error during longitudinal analysis: {e}")
@@ -0,0 +1,44 @@
+import logging
+from datetime import datetime
+from pathlib import Path
+from pipeline.atomic import atomic_write
+
+MODEL_ARTIFACT_PATH = Path('models/categorization_model.joblib')
+
+logger = logging.getLogger(__name__)
+
+def save_model_artifact(pipeline, model_name, cv_accuracy, label_encoder, feature_config, vectorizers=None,
+                        path=MODEL_ARTIFACT_PATH):
+    """
+    Persist a fitted pipeline with everything needed to score new resolutions.
+
+    The artifact is written uncompressed so that ``load_model_artifact`` can
+    memory-map its NumPy arrays, and renamed into place once complete.
+    """
+    import joblib
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    artifact = {
+        'pipeline': pipeline,
+        'model_name': model_name,
+        'cv_accuracy': cv_accuracy,
+        'label_encoder': label_encoder,
+        'feature_config': feature_config,
+        'vectorizers': vectorizers or {},
+        'trained_at': datetime.now().isoformat()
+    }
+
+    with atomic_write(path) as tmp_path:
+        joblib.dump(artifact, tmp_path, compress=0)
+    logger.info(f"Saved {model_name} model artifact (CV accuracy {cv_accuracy:.3f}) to {path}")
+
+def load_model_artifact(path=MODEL_ARTIFACT_PATH, mmap_mode='r'):
+    import joblib
+
+    artifact = joblib.load(path, mmap_mode=mmap_mode)
+    logger.info(
+        f"Loaded {artifact['model_name']} model artifact trained at {artifact['trained_at']} "
+        f"with features {artifact['feature_config']['feature_sets']}"
+    )
+    return artifact
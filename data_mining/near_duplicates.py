@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+import numpy as np
+from data_mining.preprocessing import normalizer
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = Path('data/raw/near_duplicates.sqlite3')
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+NUM_BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+# Smallest prime above 2**32, so (a * x + b) mod p never overflows uint64 for 32-bit a, b and x.
+MINHASH_PRIME = np.uint64(4294967311)
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Word ``size``-grams of the normalized tokens of a resolution (header and stop words removed)."""
+    tokens = normalizer.tokens(text)
+    if len(tokens) < size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+class MinHasher:
+    """MinHash signatures of ``num_perm`` universal hash functions, computed with NumPy."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+             for s in shingle_set),
+            dtype=np.uint64, count=len(shingle_set)
+        )
+        permuted = (np.outer(hashes, self.a) + self.b) % MINHASH_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+def estimated_similarity(signature, other):
+    return float(np.mean(signature == other))
+
+class NearDuplicateIndex:
+    """
+    On-disk MinHash/LSH index of resolution texts.
+
+    Each signature is cut into ``bands`` bands whose hashes are stored as
+    SQLite buckets; a query only compares against documents sharing at least
+    one bucket, so lookups do not scan the corpus. Candidates are confirmed
+    with the estimated Jaccard similarity of their signatures. Documents are
+    added one at a time, so the index grows with the collector.
+    """
+
+    def __init__(self, path=INDEX_PATH, num_perm=NUM_PERM, bands=NUM_BANDS, threshold=DEFAULT_THRESHOLD, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, seed)
+        self._lock = threading.RLock()
+
+        if str(path) != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS signatures (
+                doc_id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                doc_id TEXT NOT NULL,
+                PRIMARY KEY (band, bucket, doc_id)
+            );
+            CREATE TABLE IF NOT EXISTS index_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        params = f"{num_perm}|{bands}|{seed}|{SHINGLE_SIZE}"
+        with self._conn:
+            row = self._conn.execute("SELECT value FROM index_meta WHERE key = 'params'").fetchone()
+            if row is not None and row[0] != params:
+                raise ValueError(f"Index at {path} was built with parameters {row[0]}, not {params}; rebuild it.")
+            self._conn.execute("INSERT OR IGNORE INTO index_meta (key, value) VALUES ('params', ?)", (params,))
+
+    def signature(self, text):
+        return self.hasher.signature(shingles(text))
+
+    def _band_buckets(self, signature):
+        return [
+            (band, int.from_bytes(
+                hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).digest(),
+                'little', signed=True
+            ))
+            for band in range(self.bands)
+        ]
+
+    def __contains__(self, doc_id):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM signatures WHERE doc_id = ?", (doc_id,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def add(self, doc_id, text=None, signature=None):
+        """Index a document by its text or a precomputed signature; returns the signature."""
+        if signature is None:
+            signature = self.signature(text)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signatures (doc_id, signature) VALUES (?, ?)", (doc_id, signature.tobytes())
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO buckets (band, bucket, doc_id) VALUES (?, ?, ?)",
+                [(band, bucket, doc_id) for band, bucket in self._band_buckets(signature)]
+            )
+        return signature
+
+    def query(self, text=None, signature=None, threshold=None, exclude=None):
+        """
+        Indexed documents whose estimated similarity to the query is at least ``threshold``.
+
+        Returns ``(doc_id, similarity)`` pairs, most similar first.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        threshold = self.threshold if threshold is None else threshold
+        clauses = ' OR '.join(['(b.band = ? AND b.bucket = ?)'] * self.bands)
+        params = [value for pair in self._band_buckets(signature) for value in pair]
+        with self._lock:
+            candidates = self._conn.execute(
+                f"SELECT DISTINCT s.doc_id, s.signature FROM buckets b JOIN signatures s ON s.doc_id = b.doc_id "
+                f"WHERE {clauses}", params
+            ).fetchall()
+
+        matches = []
+        for doc_id, blob in candidates:
+            if doc_id == exclude:
+                continue
+            similarity = estimated_similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if similarity >= threshold:
+                matches.append((doc_id, similarity))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def near_duplicates_of(self, doc_id, threshold=None):
+        """Near-duplicates of an indexed document."""
+        with self._lock:
+            row = self._conn.execute("SELECT signature FROM signatures WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            raise KeyError(doc_id)
+        return self.query(signature=np.frombuffer(row[0], dtype=np.uint32), threshold=threshold, exclude=doc_id)
+
+    def add_and_query(self, doc_id, text):
+        """Near-duplicates of a new document among those indexed before it, then index it."""
+        signature = self.signature(text)
+        with self._lock:
+            matches = self.query(signature=signature, exclude=doc_id)
+            self.add(doc_id, signature=signature)
+        return matches
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+CACHE_PATH = Path('data/cache/nlp_cache.sqlite3')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+FLUSH_EVERY = 256
+
+logger = logging.getLogger(__name__)
+
+class NlpResultCache:
+    """
+    On-disk cache of per-document NLP results keyed by content hash.
+
+    Keys combine the document text with a pipeline ``fingerprint`` (model,
+    model version and processing rules), so any change to those invalidates
+    every entry. Entries from other fingerprints are purged on open, and the
+    least recently used entries are evicted once the cache grows past
+    ``max_bytes``.
+    """
+
+    def __init__(self, fingerprint, path=CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending = []
+        self._touched = []
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+            """
+        )
+        with self._conn:
+            purged = self._conn.execute(
+                "DELETE FROM results WHERE fingerprint != ?", (fingerprint,)
+            ).rowcount
+        if purged:
+            logger.info(f"Purged {purged} cache entries from an outdated NLP pipeline.")
+
+    def key(self, text):
+        digest = hashlib.sha256(self.fingerprint.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append(key)
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        self._pending.append((key, json.dumps(value, ensure_ascii=False)))
+        if len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (key, fingerprint, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                [(key, self.fingerprint, value, len(value), now) for key, value in self._pending]
+            )
+            self._conn.executemany(
+                "UPDATE results SET last_access = ? WHERE key = ?", [(now, key) for key in self._touched]
+            )
+        self._pending.clear()
+        self._touched.clear()
+        self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        evicted = 0
+        keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY last_access"):
+            keys.append((key,))
+            evicted += size
+            if evicted >= excess:
+                break
+        with self._conn:
+            self._conn.executemany("DELETE FROM results WHERE key = ?", keys)
+        logger.info(f"Evicted {len(keys)} NLP cache entries ({evicted} bytes).")
+
+    def close(self):
+        self.flush()
+        self._conn.close()
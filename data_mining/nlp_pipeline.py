@@ -0,0 +1,63 @@
+import logging
+from functools import lru_cache
+from importlib import metadata
+
+SPACY_MODEL = 'pt_core_news_sm'
+DEFAULT_BATCH_SIZE = 64
+
+# Components each stage needs from the model; the rest are disabled while it runs.
+LEMMATIZER_COMPONENTS = ('tok2vec', 'morphologizer', 'attribute_ruler', 'lemmatizer')
+PARSER_COMPONENTS = ('tok2vec', 'parser')
+ANALYSIS_COMPONENTS = LEMMATIZER_COMPONENTS + ('parser',)
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def load_nlp():
+    """Load the spaCy model once per process and share it across modules."""
+    import spacy
+
+    logger.info(f"Loading spaCy model {SPACY_MODEL}...")
+    return spacy.load(SPACY_MODEL)
+
+def package_version(package):
+    """Installed version of a package, read from its metadata without importing it."""
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+def model_version():
+    return package_version(SPACY_MODEL)
+
+def disabled_components(nlp, required_components):
+    return [name for name in nlp.pipe_names if name not in required_components]
+
+def make_doc(words):
+    """Build an unprocessed Doc straight from pre-tokenized words, skipping the tokenizer."""
+    from spacy.tokens import Doc
+
+    return Doc(load_nlp().vocab, words=words)
+
+def parse_document(text_or_doc, required_components=ANALYSIS_COMPONENTS):
+    nlp = load_nlp()
+    with nlp.select_pipes(disable=disabled_components(nlp, required_components)):
+        return nlp(text_or_doc)
+
+def pipe_documents(texts, required_components=ANALYSIS_COMPONENTS, batch_size=DEFAULT_BATCH_SIZE,
+                   n_process=1, as_tuples=False):
+    """
+    Parse a stream of texts with a single nlp.pipe call.
+
+    Only ``required_components`` run; ``n_process=-1`` uses every core.
+    With ``as_tuples=True`` the input is (text, context) pairs and the
+    context is passed through alongside each Doc.
+    """
+    nlp = load_nlp()
+    return nlp.pipe(
+        texts,
+        as_tuples=as_tuples,
+        batch_size=batch_size,
+        n_process=n_process,
+        disable=disabled_components(nlp, required_components)
+    )
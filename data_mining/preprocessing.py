@@ -1,31 +1,184 @@
+import hashlib
+import inspect
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-import spacy
+from data_mining.nlp_pipeline import (
+    ANALYSIS_COMPONENTS, DEFAULT_BATCH_SIZE, LEMMATIZER_COMPONENTS, SPACY_MODEL, make_doc, model_version,
+    package_version, parse_document, pipe_documents
+)
+from pipeline import instrumentation
+from data_analysis.complexity_analysis import (
+    complexity_metrics_from_counts, complexity_metrics_from_doc, document_counts
+)
 
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
-nlp = spacy.load('pt_core_news_sm')
+HEADER_PATTERN = r'RESOLUÇÃO BCB Nº \d+, DE \d+ DE \w+ DE \d+'
+
+def load_portuguese_stopwords():
+    import nltk
+    from nltk.corpus import stopwords
+
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords')
+    return stopwords.words('portuguese')
+
+class TextNormalizer:
+    """
+    Reusable, single-pass replacement for the regex chain of preprocess_text.
+
+    One precompiled pattern scans the text once, dropping the resolution
+    header and returning the same runs of letters that the old chain of
+    substitutions, lower() and word_tokenize produced. The stop-word set is
+    built once per normalizer, and the tokens go to spaCy as a Doc instead of
+    being joined and re-tokenized.
+    """
+
+    def __init__(self, header_pattern=HEADER_PATTERN, stop_words=None):
+        self.header_pattern = re.compile(header_pattern)
+        self.scan_pattern = re.compile(rf'(?:{header_pattern})|([^\W\d]+)')
+        self._stop_words = frozenset(stop_words) if stop_words is not None else None
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            self._stop_words = frozenset(load_portuguese_stopwords())
+        return self._stop_words
+
+    @stop_words.setter
+    def stop_words(self, stop_words):
+        self._stop_words = frozenset(stop_words)
+
+    def strip_header(self, text):
+        return self.header_pattern.sub('', text)
+
+    def tokens(self, text):
+        stop_words = self.stop_words
+        tokens = []
+        for match in self.scan_pattern.finditer(text):
+            word = match.group(1)
+            if word:
+                word = word.lower()
+                if word not in stop_words:
+                    tokens.append(word)
+        return tokens
+
+normalizer = TextNormalizer()
+
+def clean_text(text):
+    return ' '.join(normalizer.tokens(text))
 
 def preprocess_text(text):
-    text = re.sub(r'RESOLUÇÃO BCB Nº \d+, DE \d+ DE \w+ DE \d+', '', text)
-    
-    text = re.sub(r'\W', ' ', text)
-    text = re.sub(r'\d', ' ', text)
-    
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    text = text.lower()
-    
-    words = word_tokenize(text, language='portuguese')
-    
-    stop_words = set(stopwords.words('portuguese'))
-    words = [word for word in words if word not in stop_words]
-    
-    doc = nlp(' '.join(words))
+    doc = parse_document(make_doc(normalizer.tokens(text)), LEMMATIZER_COMPONENTS)
     words = [token.lemma_ for token in doc]
-    
+
     return ' '.join(words)
+
+def preprocess_corpus(texts, batch_size=DEFAULT_BATCH_SIZE, n_process=1):
+    """Batched preprocess_text: yields the lemmatized text of each input, in order."""
+    token_docs = (make_doc(normalizer.tokens(text)) for text in texts)
+    for doc in pipe_documents(token_docs, LEMMATIZER_COMPONENTS, batch_size=batch_size, n_process=n_process):
+        yield ' '.join(token.lemma_ for token in doc)
+
+def lemmatize_doc(doc, stop_words):
+    """Lemmas of the alphabetic, non stop-word tokens of a fully parsed document."""
+    return ' '.join(
+        token.lemma_.lower() for token in doc
+        if token.is_alpha and token.lower_ not in stop_words
+    )
+
+def analysis_fingerprint():
+    """Identify the model and rules behind analyze_corpus results, for cache invalidation."""
+    rules = [
+        SPACY_MODEL, model_version(), package_version('spacy'), normalizer.header_pattern.pattern,
+        ','.join(ANALYSIS_COMPONENTS), ','.join(sorted(normalizer.stop_words)),
+        inspect.getsource(lemmatize_doc), inspect.getsource(complexity_metrics_from_doc),
+        inspect.getsource(document_counts), inspect.getsource(complexity_metrics_from_counts)
+    ]
+    return hashlib.sha256('\0'.join(rules).encode('utf-8')).hexdigest()
+
+def analyze_corpus(texts, batch_size=DEFAULT_BATCH_SIZE, n_process=1, as_tuples=False, cache=None):
+    """
+    Preprocess and measure a corpus with one parse per document.
+
+    Each document is parsed once with the lemmatizer and the parser enabled;
+    the lemmas, sentence boundaries and dependency subtrees of that parse feed
+    both the preprocessed text and the complexity metrics. Yields
+    ``(preprocessed_text, metrics)`` per document, in input order, or
+    ``((preprocessed_text, metrics), context)`` when ``as_tuples`` is set.
+
+    When an NlpResultCache is given, documents whose text is already cached
+    skip spaCy entirely and only the misses are parsed. A hit is yielded as
+    soon as it is next in order; only hits behind documents still in
+    ``nlp.pipe`` are held back. The pipe is closed whenever it runs dry, so a
+    long run of hits is streamed rather than read ahead.
+    """
+    stop_words = normalizer.stop_words
+    entries = enumerate(texts if as_tuples else ((text, None) for text in texts))
+    ready = {}
+    # A cache hit read by the spaCy feed when no miss was left in flight, handed back to be yielded directly.
+    handed_back = []
+    in_flight = 0
+
+    def lookup(text):
+        text = normalizer.strip_header(text)
+        key = cache.key(text) if cache else None
+        cached = cache.get(key) if cache else None
+        return text, key, cached
+
+    def feed(first_miss):
+        nonlocal in_flight
+        in_flight += 1
+        yield first_miss
+        for index, (text, context) in entries:
+            text, key, cached = lookup(text)
+            if cached is None:
+                in_flight += 1
+                yield text, (index, key, context)
+            elif in_flight:
+                # Waits behind documents still being parsed.
+                ready[index] = ((cached['text'], cached['metrics']), context)
+            else:
+                handed_back.append((index, (cached['text'], cached['metrics']), context))
+                return
+
+    def drain(next_index):
+        while next_index in ready:
+            result, context = ready.pop(next_index)
+            yield (result, context) if as_tuples else result
+            next_index += 1
+
+    next_index = 0
+    while True:
+        if handed_back:
+            index, result, context = handed_back.pop()
+        else:
+            entry = next(entries, None)
+            if entry is None:
+                break
+            index, (text, context) = entry
+            text, key, cached = lookup(text)
+            if cached is None:
+                docs = pipe_documents(feed((text, (index, key, context))), ANALYSIS_COMPONENTS,
+                                      batch_size=batch_size, n_process=n_process, as_tuples=True)
+                for doc, (doc_index, doc_key, doc_context) in docs:
+                    in_flight -= 1
+                    with instrumentation.span('metrics'):
+                        try:
+                            metrics = complexity_metrics_from_doc(doc)
+                        except ZeroDivisionError:
+                            metrics = {}
+                    with instrumentation.span('lemmatize'):
+                        lemmatized = lemmatize_doc(doc, stop_words)
+                    if cache:
+                        cache.put(doc_key, {'text': lemmatized, 'metrics': metrics})
+                    ready[doc_index] = ((lemmatized, metrics), doc_context)
+
+                    for output in drain(next_index):
+                        next_index += 1
+                        yield output
+                continue
+            result = (cached['text'], cached['metrics'])
+
+        # Nothing is in flight, so this hit is next in order.
+        next_index += 1
+        yield (result, context) if as_tuples else result
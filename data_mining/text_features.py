@@ -0,0 +1,80 @@
+import logging
+from itertools import islice
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SPARSE_FEATURE_SETS = ('hashing', 'tfidf')
+DEFAULT_N_FEATURES = 2 ** 18
+DEFAULT_BATCH_SIZE = 512
+
+def build_text_vectorizer(mode, n_features=DEFAULT_N_FEATURES):
+    """
+    Vectorizer for the space-separated lemmas produced by preprocess_text.
+
+    ``hashing`` is stateless, so its memory does not depend on the vocabulary
+    and it can transform batches independently; ``tfidf`` learns a vocabulary
+    capped at ``n_features`` terms.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+
+    if mode == 'hashing':
+        return HashingVectorizer(n_features=n_features, token_pattern=r'\S+', alternate_sign=False,
+                                 dtype=np.float32)
+    if mode == 'tfidf':
+        return TfidfVectorizer(token_pattern=r'\S+', max_features=n_features, min_df=2, sublinear_tf=True,
+                               dtype=np.float32)
+    raise ValueError(f"Unknown sparse feature set '{mode}', expected one of {SPARSE_FEATURE_SETS}")
+
+def sparse_text_features(texts, mode, n_features=DEFAULT_N_FEATURES):
+    """
+    CSR document-term matrix of a corpus and the fitted vectorizer.
+
+    Memory grows with the number of non-zeros, not with vocabulary x documents.
+    """
+    vectorizer = build_text_vectorizer(mode, n_features)
+    X = vectorizer.fit_transform(texts)
+    logger.info(f"Built {mode} features: {X.shape[0]} documents x {X.shape[1]} columns, {X.nnz} non-zeros.")
+    return X, vectorizer
+
+def iter_batches(items, batch_size=DEFAULT_BATCH_SIZE):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def train_out_of_core(text_label_pairs, classes, batch_size=DEFAULT_BATCH_SIZE, n_features=DEFAULT_N_FEATURES,
+                      model=None, vectorizer=None):
+    """
+    Train a ``partial_fit`` classifier on a stream of (preprocessed text, label) pairs.
+
+    Each batch is hashed on the fly, scored by the model trained so far
+    (progressive validation) and then used to update it, so memory stays
+    bounded by ``batch_size`` whatever the corpus size. Returns the fitted
+    model and the progressive validation accuracy.
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    vectorizer = vectorizer if vectorizer is not None else build_text_vectorizer('hashing', n_features)
+    model = model if model is not None else SGDClassifier(loss='hinge', alpha=1e-5)
+    classes = np.asarray(classes)
+
+    correct = 0
+    scored = 0
+    documents = 0
+    for batch in iter_batches(text_label_pairs, batch_size):
+        texts, labels = zip(*batch)
+        X_batch = vectorizer.transform(texts)
+        y_batch = np.asarray(labels)
+
+        if documents:
+            correct += int((model.predict(X_batch) == y_batch).sum())
+            scored += len(y_batch)
+        model.partial_fit(X_batch, y_batch, classes=classes)
+        documents += len(y_batch)
+
+    accuracy = correct / scored if scored else float('nan')
+    logger.info(f"Out-of-core training on {documents} documents, progressive validation accuracy {accuracy:.3f}.")
+    return model, accuracy
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+def _fsync(path):
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+def _replace_directory(tmp_path, path):
+    old_path = Path(tempfile.mkdtemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.old'))
+    try:
+        if path.exists():
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+    finally:
+        shutil.rmtree(old_path, ignore_errors=True)
+
+@contextmanager
+def atomic_write(path, directory=False):
+    """
+    Yield a temporary path next to ``path`` and move it into place once the block completes.
+
+    The temporary file has a unique name in the directory of ``path``, so
+    concurrent writers never share it; it is flushed to disk and then renamed
+    over ``path``, so readers see either the previous file or the complete new
+    one. It is removed if the block fails. With ``directory``, the block
+    writes a directory, such as a partitioned dataset, which replaces the
+    previous one.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if directory:
+        tmp_path = Path(tempfile.mkdtemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp'))
+    else:
+        fd, name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        os.close(fd)
+        tmp_path = Path(name)
+
+    try:
+        yield tmp_path
+        files = [file for file in tmp_path.rglob('*') if file.is_file()] if directory else [tmp_path]
+        for file in files:
+            _fsync(file)
+        if directory:
+            _replace_directory(tmp_path, path)
+        else:
+            os.replace(tmp_path, path)
+    finally:
+        if directory:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        elif tmp_path.exists():
+            tmp_path.unlink()
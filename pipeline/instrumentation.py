@@ -0,0 +1,227 @@
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from pipeline.atomic import atomic_write
+
+logger = logging.getLogger(__name__)
+
+RUN_SUMMARY_DIR = Path('reports/run_summaries')
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its finished children, in MB."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    scale = 1 / 1024 ** 2 if sys.platform == 'darwin' else 1 / 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return round(max(own, children), 1)
+
+def current_rss_mb():
+    """Resident set size of this process right now, in MB; None where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+class RssSampler:
+    """
+    Samples the RSS of this process on a thread while a ``with`` block runs.
+
+    ``increase_mb`` is the highest RSS sampled during the block over the RSS
+    when it started, so it measures the block itself even in a long-lived
+    worker process. It is None where the RSS cannot be read.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.baseline_mb = None
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.baseline_mb = current_rss_mb()
+        self.peak_mb = self.baseline_mb
+        if self.baseline_mb is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    @property
+    def increase_mb(self):
+        if self.baseline_mb is None:
+            return None
+        return round(self.peak_mb - self.baseline_mb, 1)
+
+class RunInstrumentation:
+    """
+    Spans and counters of one pipeline run, summarized as JSON.
+
+    Spans are timed ``with`` blocks; nested spans are named after their
+    parents (``training/cv_fold``). Durations measured elsewhere, such as CV
+    folds run in worker processes, are added with ``record``. Counters add up
+    documents, bytes, cache hits and the like, and the summary reports the
+    throughput of every counter over the span it was counted in.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.spans = {}
+        self.counters = {}
+        self._counter_spans = {}
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _qualified(self, name):
+        stack = self._stack()
+        return '/'.join(stack + [name]) if stack else name
+
+    @contextmanager
+    def span(self, name):
+        qualified = self._qualified(name)
+        stack = self._stack()
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stack.pop()
+            self.record(qualified, time.perf_counter() - start, qualified=True)
+
+    def record(self, name, seconds, qualified=False):
+        name = name if qualified else self._qualified(name)
+        with self._lock:
+            span = self.spans.setdefault(name, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            span['count'] += 1
+            span['total_seconds'] += seconds
+            span['max_seconds'] = max(span['max_seconds'], seconds)
+
+    def count(self, name, value=1):
+        span = '/'.join(self._stack()) or None
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            if span is not None:
+                self._counter_spans.setdefault(name, span)
+
+    def merge(self, summary, prefix):
+        """Add the spans and counters of another run's summary, e.g. a stage run in a worker process."""
+        with self._lock:
+            for name, span in summary['spans'].items():
+                merged = self.spans.setdefault(f'{prefix}/{name}', {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+                merged['count'] += span['count']
+                merged['total_seconds'] += span['total_seconds']
+                merged['max_seconds'] = max(merged['max_seconds'], span['max_seconds'])
+            for name, value in summary['counters'].items():
+                self.counters[f'{prefix}/{name}'] = self.counters.get(f'{prefix}/{name}', 0) + value
+                self._counter_spans.setdefault(f'{prefix}/{name}', prefix)
+
+    def summary(self):
+        with self._lock:
+            wall_seconds = time.perf_counter() - self._start
+            spans = {name: dict(span, total_seconds=round(span['total_seconds'], 4),
+                                max_seconds=round(span['max_seconds'], 4))
+                     for name, span in self.spans.items()}
+            rates = {}
+            for name, value in self.counters.items():
+                span = self.spans.get(self._counter_spans.get(name))
+                seconds = span['total_seconds'] if span else wall_seconds
+                if seconds:
+                    rates[f'{name}_per_second'] = round(value / seconds, 2)
+            return {
+                'run': self.name,
+                'started_at': self.started_at.isoformat(),
+                'wall_seconds': round(wall_seconds, 3),
+                'peak_rss_mb': peak_rss_mb(),
+                'spans': spans,
+                'counters': dict(self.counters),
+                'rates': rates
+            }
+
+    def write_summary(self, path=None):
+        """Write the run summary as JSON, by default to ``reports/run_summaries/<run>-<start>.json``."""
+        path = Path(path) if path else RUN_SUMMARY_DIR / f"{self.name}-{self.started_at:%Y%m%dT%H%M%S}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+
+        with atomic_write(path) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Run summary written to {path} ({summary['wall_seconds']:.1f}s, "
+                    f"peak RSS {summary['peak_rss_mb']} MB)")
+        return path
+
+# Stages report to the run started by their entry point; outside of a run
+# they record into a throwaway instance, so instrumented code needs no checks.
+_current = RunInstrumentation('default')
+
+def start_run(name):
+    global _current
+    _current = RunInstrumentation(name)
+    return _current
+
+def current_run():
+    return _current
+
+def span(name):
+    return _current.span(name)
+
+def record(name, seconds):
+    _current.record(name, seconds)
+
+def count(name, value=1):
+    _current.count(name, value)
+
+@contextmanager
+def profiled(path=None):
+    """
+    Run the block under cProfile and dump its stats to ``path`` when one is given.
+
+    The dump can be opened with ``python -m pstats`` or snakeviz. Without a
+    path the block runs unprofiled, which is also the mode to use when
+    attaching py-spy to the running process.
+    """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+        logger.info(f"Profile written to {path}")
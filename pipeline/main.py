@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import logging
+from data_mining.embeddings import METRICS_FEATURE_SET, available_feature_sets
+from data_mining.main import add_model_n_jobs_argument, model_n_jobs_setting
+from data_mining.model_artifacts import MODEL_ARTIFACT_PATH
+from data_mining.text_features import SPARSE_FEATURE_SETS
+from pipeline import instrumentation
+from pipeline.runner import BLOCKED, FAILED, STATE_PATH, StageStateStore, run_stages
+from pipeline.stages import pipeline_stages
+
+STAGE_NAMES = [stage.name for stage in pipeline_stages()]
+
+def configure_logging() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('logs/pipeline.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the resolutions pipeline as a DAG of stages, skipping the ones whose inputs are unchanged."
+    )
+    parser.add_argument('--collect', action='store_true',
+                        help="Also crawl the Central Bank site for new resolutions before the other stages.")
+    parser.add_argument('--only', nargs='+', choices=STAGE_NAMES,
+                        help="Run only these stages; the inputs of the others are used as they are on disk.")
+    parser.add_argument('--force', nargs='+', choices=STAGE_NAMES + ['all'], default=[],
+                        help="Run these stages even if they are up to date.")
+    parser.add_argument('--max-workers', type=int, help="Stages run in parallel (default: one per CPU).")
+    parser.add_argument('--features', nargs='+', choices=available_feature_sets() + SPARSE_FEATURE_SETS,
+                        default=[METRICS_FEATURE_SET], help="Feature sets the model is trained on.")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Parallel cross-validation workers.")
+    add_model_n_jobs_argument(parser)
+    parser.add_argument('--resampling', choices=('smote', 'oversample', 'class_weight', 'none'),
+                        help="Class balancing applied inside each CV fold.")
+    parser.add_argument('--tokens-per-batch', type=int, default=8192,
+                        help="Token budget of each padded BERT inference batch.")
+    parser.add_argument('--model-path', type=Path, default=MODEL_ARTIFACT_PATH)
+    parser.add_argument('--granularity', choices=('year', 'quarter', 'month'), default='year',
+                        help="Period of the longitudinal trends.")
+    parser.add_argument('--state-path', type=Path, default=STATE_PATH,
+                        help="SQLite store of the stage fingerprints.")
+    parser.add_argument('--run-summary', type=Path,
+                        help="Where to write the JSON run summary (default: reports/run_summaries/).")
+    args = parser.parse_args(argv)
+    try:
+        args.model_n_jobs = model_n_jobs_setting(args.model_n_jobs)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    Path('logs').mkdir(exist_ok=True)
+    Path('reports').mkdir(exist_ok=True)
+    configure_logging()
+    logger = logging.getLogger(__name__)
+
+    stages = pipeline_stages(args.features, n_jobs=args.n_jobs, resampling=args.resampling,
+                             tokens_per_batch=args.tokens_per_batch, granularity=args.granularity,
+                             model_path=args.model_path, model_n_jobs=args.model_n_jobs)
+    if args.only:
+        stages = [stage for stage in stages if stage.name in args.only]
+    elif not args.collect:
+        stages = [stage for stage in stages if stage.name != 'collection']
+    force = STAGE_NAMES if 'all' in args.force else args.force
+
+    run = instrumentation.start_run('pipeline')
+    state = StageStateStore(args.state_path)
+    try:
+        outcomes = run_stages(stages, state, force=force, max_workers=args.max_workers)
+    finally:
+        state.close()
+        run.write_summary(args.run_summary)
+
+    logger.info("Pipeline finished: " + ', '.join(f"{name} {outcome}" for name, outcome in outcomes.items()))
+    if any(outcome in (FAILED, BLOCKED) for outcome in outcomes.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
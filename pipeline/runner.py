@@ -0,0 +1,319 @@
+import ast
+import hashlib
+import inspect
+import json
+import logging
+import multiprocessing
+import sqlite3
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+from pipeline import instrumentation
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = Path('data/cache/pipeline_state.sqlite3')
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+HASH_CHUNK_SIZE = 1024 * 1024
+
+DONE = 'done'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+@dataclass
+class Stage:
+    """
+    One step of the pipeline: a module-level function and the files it reads and writes.
+
+    Stages depend on the stages producing their ``inputs``. The source of
+    every project module ``function`` uses, directly or through imports, is
+    part of the stage fingerprint next to the inputs and ``params``;
+    ``code`` adds modules the imports do not reveal.
+    Stages marked ``always_run`` read from outside the tree, like the
+    collector, and are never skipped.
+    """
+    name: str
+    function: Callable
+    inputs: List[Path] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+    params: Dict = field(default_factory=dict)
+    code: List[str] = field(default_factory=list)
+    always_run: bool = False
+
+class StageStateStore:
+    """
+    SQLite store of the fingerprint each stage last completed with.
+
+    Content digests of input files are cached by size and modification time,
+    so unchanged inputs are not read again to fingerprint a stage.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS stage_runs (
+                stage TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                seconds REAL NOT NULL,
+                finished_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS file_digests (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def fingerprint(self, stage_name):
+        row = self._conn.execute("SELECT fingerprint FROM stage_runs WHERE stage = ?", (stage_name,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, stage_name, fingerprint, seconds):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stage_runs (stage, fingerprint, seconds, finished_at) VALUES (?, ?, ?, ?)",
+                (stage_name, fingerprint, seconds, datetime.now().isoformat())
+            )
+
+    def file_digest(self, path):
+        path = Path(path)
+        stat = path.stat()
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, digest FROM file_digests WHERE path = ?", (str(path),)
+        ).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_digests (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                (str(path), stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+            )
+        return digest.hexdigest()
+
+    def path_digest(self, path):
+        """Digest of a file, or of every file under a directory; None when the path does not exist."""
+        path = Path(path)
+        if path.is_file():
+            return self.file_digest(path)
+        if not path.is_dir():
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        for file in sorted(p for p in path.rglob('*') if p.is_file()):
+            digest.update(f"{file.relative_to(path).as_posix()}\0{self.file_digest(file)}\0".encode('utf-8'))
+        return digest.hexdigest()
+
+    def close(self):
+        self._conn.close()
+
+def project_module_path(module_name):
+    """Source file of a module of this project; None for standard library and third-party modules."""
+    base = PROJECT_ROOT.joinpath(*module_name.split('.'))
+    for candidate in (base.with_suffix('.py'), base / '__init__.py'):
+        if candidate.is_file():
+            return candidate
+    return None
+
+def imported_modules(tree):
+    """Every module an AST imports, including imports inside functions and ``from package import module``."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            yield node.module
+            yield from (f'{node.module}.{alias.name}' for alias in node.names)
+
+def function_modules(function):
+    """Modules ``function`` imports in its body or uses through module-level names."""
+    tree = ast.parse(inspect.getsource(function).strip() + '\n')
+    modules = set(imported_modules(tree))
+    for name in {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}:
+        value = function.__globals__.get(name)
+        module = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+        if isinstance(module, str):
+            modules.add(module)
+    return modules
+
+def stage_code(stage):
+    """
+    The project modules a stage runs: those its function uses and, transitively, everything they import.
+
+    Imports inside functions count too, since they run when the stage does;
+    packages are included along with their modules. The module defining the
+    function is fingerprinted whole but only followed through the function,
+    so the imports of the other stages in it do not count.
+    """
+    entry_module = stage.function.__module__
+    code = {entry_module: project_module_path(entry_module) or Path(inspect.getfile(stage.function))}
+    pending = (function_modules(stage.function) | set(stage.code)) - {entry_module}
+    while pending:
+        name = pending.pop()
+        parts = name.split('.')
+        pending.update('.'.join(parts[:i]) for i in range(1, len(parts)))
+        if name in code:
+            continue
+        path = project_module_path(name)
+        if path is None:
+            continue
+        code[name] = path
+        pending.update(imported_modules(ast.parse(path.read_text(encoding='utf-8'))))
+    return code
+
+def stage_fingerprint(stage, state):
+    """Hash of the stage parameters, the contents of its inputs and the source of its code."""
+    payload = {
+        'stage': stage.name,
+        'function': stage.function.__qualname__,
+        'params': stage.params,
+        'inputs': {str(path): state.path_digest(path) for path in stage.inputs},
+        'code': {name: state.path_digest(path) for name, path in sorted(stage_code(stage).items())}
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def stage_dependencies(stages):
+    """
+    Map every stage to the stages producing its inputs, in a valid run order.
+
+    Only the given stages are considered: inputs produced by a stage that
+    is not part of the run are used as they are on disk.
+    """
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if Path(output) in producers:
+                raise ValueError(f"'{output}' is produced by both '{producers[Path(output)]}' and '{stage.name}'")
+            producers[Path(output)] = stage.name
+
+    dependencies = {
+        stage.name: sorted({producers[Path(path)] for path in stage.inputs if Path(path) in producers} - {stage.name})
+        for stage in stages
+    }
+    ordered = {}
+    while len(ordered) < len(dependencies):
+        ready = [name for name, requires in dependencies.items()
+                 if name not in ordered and all(required in ordered for required in requires)]
+        if not ready:
+            cycle = sorted(set(dependencies) - set(ordered))
+            raise ValueError(f"Stage dependencies form a cycle among {', '.join(cycle)}")
+        for name in ready:
+            ordered[name] = dependencies[name]
+    return ordered
+
+def shutdown_joblib_workers():
+    """
+    Stop joblib's reusable worker pool, if the stage started one.
+
+    Idle loky workers otherwise outlive the stage until their timeout and keep
+    the runner's pool from shutting down. Asking loky for its reusable
+    executor replaces the memmapping executor of ``Parallel``, which removes
+    its shared-memory folders, and the replacement is shut down with its
+    workers.
+    """
+    if 'joblib' not in sys.modules or not multiprocessing.active_children():
+        return
+    from joblib.externals.loky import get_reusable_executor
+
+    get_reusable_executor().shutdown(wait=True, kill_workers=True)
+
+def execute_stage(name, function, params):
+    """Run one stage in a worker process under its own instrumentation; returns its run summary."""
+    run = instrumentation.start_run(name)
+    try:
+        function(**params)
+    finally:
+        shutdown_joblib_workers()
+    return run.summary()
+
+def run_stages(stages, state, force=(), max_workers=None):
+    """
+    Run ``stages`` as a DAG on a process pool and return the outcome of each.
+
+    A stage starts as soon as the stages producing its inputs are done or
+    skipped, so independent branches run side by side in separate processes.
+    A stage is skipped when its fingerprint matches its last completed run
+    and its outputs exist, unless its name is in ``force``. A failed stage
+    blocks every stage downstream of it; the others still run.
+    """
+    dependencies = stage_dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    pending = list(dependencies)
+    outcomes = {}
+    running = {}
+
+    def schedule():
+        progressed = False
+        for name in list(pending):
+            requires = [outcomes.get(required) for required in dependencies[name]]
+            if any(outcome in (FAILED, BLOCKED) for outcome in requires):
+                pending.remove(name)
+                outcomes[name] = BLOCKED
+                logger.error(f"Stage '{name}' not run: an upstream stage failed.")
+                progressed = True
+                continue
+            if not all(outcome in (DONE, SKIPPED) for outcome in requires):
+                continue
+
+            pending.remove(name)
+            progressed = True
+            stage = by_name[name]
+            try:
+                fingerprint = stage_fingerprint(stage, state)
+            except Exception as e:
+                outcomes[name] = FAILED
+                logger.error(f"Error fingerprinting stage '{name}': {e}")
+                continue
+            up_to_date = (
+                not stage.always_run and name not in force and state.fingerprint(name) == fingerprint
+                and all(Path(output).exists() for output in stage.outputs)
+            )
+            if up_to_date:
+                outcomes[name] = SKIPPED
+                logger.info(f"Stage '{name}' is up to date, skipped.")
+                continue
+            logger.info(f"Running stage '{name}'...")
+            running[executor.submit(execute_stage, name, stage.function, stage.params)] = (stage, fingerprint)
+        return progressed
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            while schedule():
+                pass
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, fingerprint = running.pop(future)
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    outcomes[stage.name] = FAILED
+                    logger.error(f"Stage '{stage.name}' failed: {e}", exc_info=e)
+                    continue
+
+                instrumentation.record(stage.name, summary['wall_seconds'])
+                instrumentation.current_run().merge(summary, stage.name)
+                missing = [str(output) for output in stage.outputs if not Path(output).exists()]
+                if missing:
+                    outcomes[stage.name] = FAILED
+                    logger.error(f"Stage '{stage.name}' finished without writing {', '.join(missing)}")
+                    continue
+                state.record(stage.name, fingerprint, summary['wall_seconds'])
+                outcomes[stage.name] = DONE
+                logger.info(f"Stage '{stage.name}' completed in {summary['wall_seconds']:.1f}s.")
+
+    for outcome in outcomes.values():
+        instrumentation.count(f'stages_{outcome}')
+    return outcomes
@@ -0,0 +1,133 @@
+import logging
+from pathlib import Path
+from data_analysis.analytics_store import ANALYTICS_STORE_PATH, PREDICTIONS_PATH
+from data_analysis.complexity_analysis import REPORT_PATH as COMPLEXITY_REPORT_PATH
+from data_collection.content_validator import VALIDATION_RESULTS_PATH
+from data_collection.resolution_records import RESOLUTIONS_FILE_NAME
+from data_mining.embeddings import METRICS_FEATURE_SET
+from data_mining.model_artifacts import MODEL_ARTIFACT_PATH
+from pipeline import instrumentation
+from pipeline.runner import Stage
+
+# Stage functions run in worker processes; heavy dependencies are imported inside them.
+
+logger = logging.getLogger(__name__)
+
+RAW_DATA_DIR = Path('data/raw')
+PROCESSED_DATA_DIR = Path('data/processed')
+RESOLUTIONS_PATH = RAW_DATA_DIR / RESOLUTIONS_FILE_NAME
+STATISTICAL_REPORT_PATH = Path('reports/statistical_analysis_report.txt')
+TRENDS_REPORT_PATH = Path('reports/longitudinal_trends_report.txt')
+TRENDS_PLOT_PATH = Path('reports/longitudinal_trends.png')
+
+def collect(raw_data_dir):
+    from data_collection.resolution_collector import collect_central_bank_resolutions
+
+    Path(raw_data_dir).mkdir(parents=True, exist_ok=True)
+    collect_central_bank_resolutions(raw_data_dir)
+
+def validate(processed_data_dir, results_path):
+    from data_collection.content_validator import validate_resolution_directory
+
+    results = validate_resolution_directory(processed_data_dir, results_path=results_path)
+    instrumentation.count('files_validated', len(results))
+    for file_result in results.values():
+        if not file_result.is_valid:
+            instrumentation.count('files_invalid')
+            logger.warning(
+                f"Content validation failed for {file_result.file_name}: "
+                f"{', '.join(file_result.validation_errors)}"
+            )
+
+def compute_metrics(data_path, store_path, report_path):
+    from data_analysis.analytics_store import write_analytics_store
+    from data_analysis.complexity_analysis import write_complexity_report
+    from data_mining.main import analyze_resolutions
+
+    corpus = analyze_resolutions(data_path)
+    write_complexity_report(corpus.complexity_metrics, report_path)
+    with instrumentation.span('analytics_store'):
+        write_analytics_store(corpus.analytics_rows, store_path)
+
+def train_model(data_path, predictions_path, model_path, features, n_jobs, resampling, tokens_per_batch,
+                model_n_jobs=1):
+    from data_analysis.analytics_store import write_predictions
+    from data_mining.features import FeatureBuilder
+    from data_mining.main import analyze_resolutions, calculate_accuracy_scores, fit_categorization_model
+
+    feature_builder = FeatureBuilder(features, {'bert': {'tokens_per_batch': tokens_per_batch}})
+    # Runs after the metrics stage, so every document is served from the NLP result cache.
+    corpus = analyze_resolutions(data_path, feature_builder)
+    if len(set(corpus.categories)) <= 1:
+        raise ValueError("The dataset needs to have more than one category.")
+
+    with instrumentation.span('features'):
+        X = feature_builder.build(corpus.resolution_ids, corpus.complexity_metrics, corpus.texts)
+    corpus.texts.clear()
+
+    y_encoded, y_pred = fit_categorization_model(X, corpus.categories, feature_builder, n_jobs=n_jobs,
+                                                 resampling=resampling, model_path=model_path,
+                                                 model_n_jobs=model_n_jobs)
+    write_predictions(corpus.resolution_ids, calculate_accuracy_scores(y_encoded, y_pred), predictions_path)
+
+def analyze_statistics(store_path, predictions_path):
+    from data_analysis.statistical_analysis import analyze_complexity_vs_accuracy
+
+    analyze_complexity_vs_accuracy(store_path, predictions_path=predictions_path)
+
+def analyze_trends(store_path, granularity):
+    from data_analysis.longitudinal_analysis import plot_trends
+
+    plot_trends(store_path, granularity=granularity)
+
+def pipeline_stages(features=(METRICS_FEATURE_SET,), n_jobs=-1, resampling=None, tokens_per_batch=8192,
+                    granularity='year', model_path=MODEL_ARTIFACT_PATH, model_n_jobs=1):
+    """
+    The collection-to-analysis pipeline as stages with declared inputs and outputs.
+
+    Metrics feed both modelling and the longitudinal analysis, so trends are
+    plotted while the models train; the statistical analysis joins the
+    metrics with the model's per-resolution accuracy.
+    """
+    return [
+        Stage(
+            'collection', collect,
+            outputs=[RESOLUTIONS_PATH],
+            params={'raw_data_dir': RAW_DATA_DIR},
+            always_run=True
+        ),
+        Stage(
+            'validation', validate,
+            inputs=[PROCESSED_DATA_DIR],
+            outputs=[VALIDATION_RESULTS_PATH],
+            params={'processed_data_dir': PROCESSED_DATA_DIR, 'results_path': VALIDATION_RESULTS_PATH}
+        ),
+        Stage(
+            'metrics', compute_metrics,
+            inputs=[RESOLUTIONS_PATH],
+            outputs=[ANALYTICS_STORE_PATH, COMPLEXITY_REPORT_PATH],
+            params={'data_path': RESOLUTIONS_PATH, 'store_path': ANALYTICS_STORE_PATH,
+                    'report_path': COMPLEXITY_REPORT_PATH}
+        ),
+        Stage(
+            'modelling', train_model,
+            # The store holds the metrics the model trains on, as computed by the metrics stage.
+            inputs=[RESOLUTIONS_PATH, ANALYTICS_STORE_PATH],
+            outputs=[Path(model_path), PREDICTIONS_PATH],
+            params={'data_path': RESOLUTIONS_PATH, 'predictions_path': PREDICTIONS_PATH, 'model_path': Path(model_path),
+                    'features': list(features), 'n_jobs': n_jobs, 'resampling': resampling,
+                    'tokens_per_batch': tokens_per_batch, 'model_n_jobs': model_n_jobs}
+        ),
+        Stage(
+            'statistical_analysis', analyze_statistics,
+            inputs=[ANALYTICS_STORE_PATH, PREDICTIONS_PATH],
+            outputs=[STATISTICAL_REPORT_PATH],
+            params={'store_path': ANALYTICS_STORE_PATH, 'predictions_path': PREDICTIONS_PATH}
+        ),
+        Stage(
+            'longitudinal_analysis', analyze_trends,
+            inputs=[ANALYTICS_STORE_PATH],
+            outputs=[TRENDS_REPORT_PATH, TRENDS_PLOT_PATH],
+            params={'store_path': ANALYTICS_STORE_PATH, 'granularity': granularity}
+        ),
+    ]
@@ -0,0 +1,123 @@
+import itertools
+
+import pytest
+
+from data_mining import preprocessing
+from data_mining.preprocessing import analyze_corpus
+
+class StubDoc:
+    def __init__(self, text):
+        self.text = text
+
+class StubCache:
+    """In-memory stand-in for NlpResultCache, keyed by the text itself."""
+
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self.puts = []
+
+    def key(self, text):
+        return text
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, value):
+        self.puts.append(key)
+        self.entries[key] = value
+
+def analyzed(text):
+    return {'text': text.upper(), 'metrics': {'length': len(text)}}
+
+def expected_output(texts):
+    return [(analyzed(text)['text'], analyzed(text)['metrics']) for text in texts]
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Texts parsed by the stub pipe, which reads its input lazily in batches like nlp.pipe."""
+    parsed = []
+
+    def stub_pipe(texts, required_components, batch_size, n_process, as_tuples):
+        assert as_tuples
+        texts = iter(texts)
+        while True:
+            batch = list(itertools.islice(texts, batch_size))
+            if not batch:
+                return
+            for text, context in batch:
+                parsed.append(text)
+                yield StubDoc(text), context
+
+    monkeypatch.setattr(preprocessing, 'pipe_documents', stub_pipe)
+    monkeypatch.setattr(preprocessing, 'complexity_metrics_from_doc', lambda doc: analyzed(doc.text)['metrics'])
+    monkeypatch.setattr(preprocessing, 'lemmatize_doc', lambda doc, stop_words: analyzed(doc.text)['text'])
+    monkeypatch.setattr(preprocessing.normalizer, '_stop_words', frozenset())
+    return parsed
+
+def test_all_hits_skip_the_pipe_and_stream_in_order(parsed):
+    texts = ['a', 'b', 'c']
+    cache = StubCache({text: analyzed(text) for text in texts})
+    read = []
+
+    def source():
+        for text in texts:
+            read.append(text)
+            yield text
+
+    results = analyze_corpus(source(), cache=cache)
+    assert next(results) == expected_output(['a'])[0]
+    assert read == ['a']
+    assert list(results) == expected_output(['b', 'c'])
+    assert parsed == []
+    assert cache.puts == []
+
+def test_all_misses_are_parsed_once_and_cached(parsed):
+    texts = ['a', 'b', 'c', 'd', 'e']
+    cache = StubCache()
+
+    assert list(analyze_corpus(texts, batch_size=2, cache=cache)) == expected_output(texts)
+    assert parsed == texts
+    assert cache.puts == texts
+    assert cache.entries == {text: analyzed(text) for text in texts}
+
+def test_without_a_cache_every_document_is_parsed(parsed):
+    texts = ['a', 'b', 'c']
+
+    assert list(analyze_corpus(texts, batch_size=2)) == expected_output(texts)
+    assert parsed == texts
+
+@pytest.mark.parametrize('batch_size', [1, 2, 3, 10])
+def test_interleaved_hits_and_misses_keep_input_order(parsed, batch_size):
+    texts = ['hit1', 'miss1', 'hit2', 'hit3', 'miss2', 'miss3', 'hit4', 'miss4', 'hit5']
+    cache = StubCache({text: analyzed(text) for text in texts if text.startswith('hit')})
+    contexts = [f'context-{i}' for i in range(len(texts))]
+
+    results = list(analyze_corpus(zip(texts, contexts), batch_size=batch_size, as_tuples=True, cache=cache))
+
+    assert results == list(zip(expected_output(texts), contexts))
+    assert parsed == ['miss1', 'miss2', 'miss3', 'miss4']
+    assert cache.puts == ['miss1', 'miss2', 'miss3', 'miss4']
+
+def test_duplicate_texts_get_the_same_result_in_place(parsed):
+    texts = ['a', 'b', 'a', 'c', 'b', 'a']
+    cache = StubCache()
+
+    assert list(analyze_corpus(texts, batch_size=1, cache=cache)) == expected_output(texts)
+    # With one document per batch, each result is cached before the duplicate is looked up.
+    assert parsed == ['a', 'b', 'c']
+    assert cache.entries == {text: analyzed(text) for text in 'abc'}
+
+def test_duplicate_texts_in_one_batch(parsed):
+    texts = ['a', 'a', 'b', 'a']
+    cache = StubCache()
+
+    assert list(analyze_corpus(texts, batch_size=4, cache=cache)) == expected_output(texts)
+    assert cache.entries == {text: analyzed(text) for text in 'ab'}
+
+def test_empty_input(parsed):
+    cache = StubCache()
+
+    assert list(analyze_corpus([], cache=cache)) == []
+    assert list(analyze_corpus([], as_tuples=True, cache=cache)) == []
+    assert parsed == []
+    assert cache.puts == []
@@ -0,0 +1,148 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from data_collection.http_fetcher import HttpResolutionFetcher, parse_resolution_html, parse_resolution_json
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+API_PATH = "/api/conteudo/app/normativos/exibenormativo"
+PAGE_PATH = "/estabilidadefinanceira/exibenormativo"
+
+def fixture_text(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+class StubBcbHandler(BaseHTTPRequestHandler):
+    """
+    Serves recorded pages the way the Central Bank site does.
+
+    Resolution 381 is available through the normative API, 380 only as a
+    static page, and 999 only as a JavaScript shell that needs a browser.
+    The page of 503 fails with a 503 on its first request of each fetch.
+    """
+
+    unavailable = set()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == API_PATH and query.get("p2") == ["381"]:
+            self.respond(200, "application/json; charset=utf-8", fixture_text("resolution_api.json"))
+        elif url.path == API_PATH:
+            self.respond(404, "text/plain", "not found")
+        elif url.path == PAGE_PATH and query.get("numero") == ["380"]:
+            self.respond(200, "text/html; charset=utf-8", fixture_text("resolution_page.html"))
+        elif url.path == PAGE_PATH and query.get("numero") == ["999"]:
+            self.respond(200, "text/html; charset=utf-8", fixture_text("resolution_page_js.html"))
+        elif url.path == PAGE_PATH and query.get("numero") == ["503"]:
+            if self.path in self.unavailable:
+                self.unavailable.discard(self.path)
+                self.respond(200, "text/html; charset=utf-8", fixture_text("resolution_page.html"))
+            else:
+                self.unavailable.add(self.path)
+                self.respond(503, "text/plain", "unavailable")
+        else:
+            self.respond(404, "text/plain", "not found")
+
+    def respond(self, status, content_type, body):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubBcbHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+class RecordingRateLimiter:
+    def __init__(self):
+        self.urls = []
+
+    def wait(self, url):
+        self.urls.append(url)
+
+@pytest.fixture
+def rate_limiter():
+    return RecordingRateLimiter()
+
+@pytest.fixture
+def fetcher(stub_server, rate_limiter):
+    fetcher = HttpResolutionFetcher(api_url=stub_server + API_PATH, rate_limiter=rate_limiter)
+    yield fetcher
+    fetcher.close()
+
+def resolution_url(base_url, number):
+    return f"{base_url}{PAGE_PATH}?tipo=Resolução BCB&numero={number}"
+
+def test_parse_resolution_html_reads_title_and_body_spans():
+    page = parse_resolution_html(fixture_text("resolution_page.html"))
+
+    assert page.title == "Resolução BCB n° 380 de 28/3/2024"
+    lines = page.content.split("\n")
+    assert lines[0] == "RESOLUÇÃO BCB Nº 380, DE 28 DE MARÇO DE 2024"
+    assert lines[-1] == "Art. 2º Esta Resolução entra em vigor na data de sua publicação."
+    assert len(lines) == 4
+
+def test_parse_resolution_html_returns_none_for_javascript_shell():
+    assert parse_resolution_html(fixture_text("resolution_page_js.html")) is None
+
+def test_parse_resolution_json_reads_title_and_body():
+    page = parse_resolution_json(json.loads(fixture_text("resolution_api.json")))
+
+    assert page.title == "Resolução BCB n° 381 de 4/4/2024"
+    assert page.content.split("\n") == [
+        "RESOLUÇÃO BCB Nº 381, DE 4 DE ABRIL DE 2024",
+        "Altera a Resolução BCB nº 80, de 25 de março de 2021.",
+        "Art. 1º Esta Resolução entra em vigor na data de sua publicação.",
+    ]
+
+def test_parse_resolution_json_without_spans_uses_text():
+    page = parse_resolution_json({"conteudo": [{"Titulo": "Resolução BCB n° 1", "Texto": "<p>Texto corrido</p>"}]})
+
+    assert page.content == "Texto corrido"
+
+@pytest.mark.parametrize("payload", [{}, {"conteudo": []}, {"conteudo": [{"Titulo": "", "Texto": "x"}]}, []])
+def test_parse_resolution_json_returns_none_for_incomplete_payloads(payload):
+    assert parse_resolution_json(payload) is None
+
+def test_fetch_uses_the_json_api(fetcher, stub_server):
+    page = fetcher.fetch(resolution_url(stub_server, 381))
+
+    assert page.title == "Resolução BCB n° 381 de 4/4/2024"
+    assert page.content.startswith("RESOLUÇÃO BCB Nº 381")
+
+def test_fetch_falls_back_to_the_static_page(fetcher, stub_server):
+    page = fetcher.fetch(resolution_url(stub_server, 380))
+
+    assert page.title == "Resolução BCB n° 380 de 28/3/2024"
+    assert page.content.startswith("RESOLUÇÃO BCB Nº 380")
+
+def test_fetch_returns_none_when_the_page_needs_javascript(fetcher, stub_server):
+    assert fetcher.fetch(resolution_url(stub_server, 999)) is None
+
+def test_fetch_returns_none_when_the_page_is_missing(fetcher, stub_server):
+    assert fetcher.fetch(resolution_url(stub_server, 404)) is None
+
+def test_fetch_waits_for_the_rate_limiter_before_each_request(fetcher, stub_server, rate_limiter):
+    fetcher.fetch(resolution_url(stub_server, 380))
+
+    assert [urlparse(url).path for url in rate_limiter.urls] == [API_PATH, PAGE_PATH]
+
+def test_fetch_waits_for_the_rate_limiter_before_retries(fetcher, stub_server, rate_limiter):
+    page = fetcher.fetch(resolution_url(stub_server, 503))
+
+    assert page.title == "Resolução BCB n° 380 de 28/3/2024"
+    assert [urlparse(url).path for url in rate_limiter.urls] == [API_PATH, PAGE_PATH, PAGE_PATH]